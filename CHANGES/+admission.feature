@@ -0,0 +1 @@
+Added ``aiojobs.aiohttp.admission_middleware()`` rejecting requests with 503 while the scheduler is saturated.
@@ -0,0 +1 @@
+Added ``Scheduler.as_completed()`` iterating over jobs in completion order.
@@ -0,0 +1 @@
+Made ``Scheduler.close()`` cancel all jobs in one pass and wait for them under a single ``close_timeout`` deadline, speeding up shutdown of large schedulers.
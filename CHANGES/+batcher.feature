@@ -0,0 +1 @@
+Added ``Batcher`` collecting submitted items into batches processed by scheduler jobs.
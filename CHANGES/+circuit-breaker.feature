@@ -0,0 +1 @@
+Added ``CircuitBreaker`` integrated with ``Scheduler.spawn()`` admission through the ``breaker_key`` parameter.
@@ -0,0 +1 @@
+Added ``dedup_key`` parameter to ``Scheduler.spawn()`` returning an already active or pending job spawned with the same key; ``spawn()`` accepts coroutine factories now.
@@ -0,0 +1 @@
+Added ``Scheduler.drain()`` with tag deadlines and progress reporting, and ``drain`` parameter of ``aiojobs.aiohttp.setup()``.
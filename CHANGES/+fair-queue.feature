@@ -0,0 +1 @@
+Added ``fair_queue`` mode of ``Scheduler`` promoting pending jobs of tenants by deficit round-robin.
@@ -0,0 +1 @@
+Added ``Scheduler.defer()`` spilling jobs over ``spill_threshold`` to a SQLite backed ``JobStore``.
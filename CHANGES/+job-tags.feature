@@ -0,0 +1 @@
+Added ``tags`` parameter to ``Scheduler.spawn()`` with ``jobs_by_tag()``, ``count_by_tag()`` and ``close_tagged()`` lookups backed by an index.
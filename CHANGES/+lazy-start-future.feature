@@ -0,0 +1 @@
+Reduced allocations of ``Scheduler.spawn()`` by creating the start future of a job on demand.
@@ -0,0 +1 @@
+Reduced per request overhead of ``aiojobs.aiohttp.atomic``.
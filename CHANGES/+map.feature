@@ -0,0 +1 @@
+Added ``Scheduler.map()`` running a job per item of an async iterable with a bounded window.
@@ -0,0 +1 @@
+Added ``metrics`` option of ``Scheduler`` and ``aiojobs.aiohttp.metrics_handler()`` rendering scheduler statistics in Prometheus text format.
@@ -0,0 +1 @@
+Added ``overflow_policy`` parameter to ``Scheduler`` for shedding load when the pending queue is full, along with the ``Scheduler.shed_count`` counter.
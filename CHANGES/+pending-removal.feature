@@ -0,0 +1 @@
+Closing a pending job now removes it from the pending queue immediately, releasing its ``pending_limit`` slot and coroutine.
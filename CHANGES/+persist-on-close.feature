@@ -0,0 +1 @@
+Added ``persist_on_close`` scheduler option saving unfinished deferred jobs to the ``JobStore`` on ``close()`` and ``Scheduler.restore()`` to resume them.
@@ -0,0 +1 @@
+Added ``Pipeline`` chaining stages run by schedulers through bounded queues.
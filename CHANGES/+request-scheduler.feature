@@ -0,0 +1 @@
+Added ``aiojobs.aiohttp.request_scheduler()`` returning a scope of request jobs closed when the handler returns, enabled by ``setup(app, request_scopes=True)``.
@@ -0,0 +1 @@
+Added ``result_policy`` to ``Scheduler`` and ``Scheduler.spawn()`` to release results of finished jobs, and ``Job.status``, ``Job.started_at`` and ``Job.finished_at``.
@@ -0,0 +1 @@
+Added ``retry`` parameter to ``Scheduler.spawn()`` accepting a ``RetryPolicy``; backoff delays don't hold a concurrency slot and retried jobs are resumed ahead of the pending queue.
@@ -0,0 +1 @@
+Added ``parent`` parameter of ``Scheduler`` for child schedulers borrowing the concurrency limit of their parent.
@@ -0,0 +1 @@
+Added ``Scheduler.spawn_cached()`` memoizing job results with a TTL and LRU eviction, with ``Scheduler.cache_info()`` and ``Scheduler.cache_clear()``.
@@ -0,0 +1 @@
+Added ``task_factory`` option to ``Scheduler`` and ``context`` parameter to ``Scheduler.spawn()``.
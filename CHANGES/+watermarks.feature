@@ -0,0 +1 @@
+Added high/low watermark backpressure signals to ``Scheduler``: ``Scheduler.add_watermark_callbacks()`` and ``Scheduler.wait_for_capacity()``.
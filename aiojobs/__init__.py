@@ -8,8 +8,15 @@ asyncio applications.
 import warnings
 from typing import Optional
 
+from ._batcher import Batcher
+from ._breaker import CircuitBreaker, CircuitOpenError, CircuitStats
+from ._cache import CacheInfo
 from ._job import Job
+from ._metrics import SchedulerMetrics
+from ._pipeline import Pipeline, Stage, StageStats
+from ._retry import RetryPolicy
 from ._scheduler import ExceptionHandler, Scheduler
+from ._store import JobStore
 
 __version__ = "1.4.0"
 
@@ -35,4 +42,19 @@ async def create_scheduler(
     )
 
 
-__all__ = ("Job", "Scheduler", "create_scheduler")
+__all__ = (
+    "Batcher",
+    "CacheInfo",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "CircuitStats",
+    "Job",
+    "JobStore",
+    "Pipeline",
+    "RetryPolicy",
+    "Scheduler",
+    "SchedulerMetrics",
+    "Stage",
+    "StageStats",
+    "create_scheduler",
+)
@@ -0,0 +1,190 @@
+import asyncio
+import sys
+from collections.abc import Awaitable, Sequence
+from functools import partial
+from types import TracebackType
+from typing import Any, Callable, Generic, List, Optional, Set, Type, TypeVar
+
+from ._job import Job
+from ._scheduler import Scheduler
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    Self = TypeVar("Self", bound="Batcher[Any, Any]")
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+BatchFunction = Callable[[List[_T]], Awaitable[Sequence[_R]]]
+
+
+def _cancel_futures(futures: "List[asyncio.Future[Any]]", job: Job[None]) -> None:
+    # A batch job which never ran or was cancelled leaves its callers waiting.
+    for fut in futures:
+        if not fut.done():
+            fut.cancel()
+
+
+class Batcher(Generic[_T, _R]):
+    """Collect submitted items into batches processed by scheduler jobs."""
+
+    __slots__ = (
+        "_scheduler",
+        "_batch_fn",
+        "_max_size",
+        "_max_delay",
+        "_name",
+        "_items",
+        "_futures",
+        "_timer",
+        "_jobs",
+        "_closed",
+    )
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        batch_fn: BatchFunction[_T, _R],
+        *,
+        max_size: int = 100,
+        max_delay: float = 0.01,
+        name: Optional[str] = None,
+    ):
+        if max_size < 1:
+            raise ValueError(f"max_size should be positive, got {max_size!r}")
+        if max_delay < 0:
+            raise ValueError(f"max_delay should be non-negative, got {max_delay!r}")
+        self._scheduler = scheduler
+        self._batch_fn = batch_fn
+        self._max_size = max_size
+        self._max_delay = max_delay
+        self._name = name
+        self._items: List[_T] = []
+        self._futures: List[asyncio.Future[_R]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._jobs: Set[Job[None]] = set()
+        self._closed = False
+
+    def __repr__(self) -> str:
+        state = "closed " if self._closed else ""
+        return f"<Batcher {state}items={len(self._items)} batches={len(self._jobs)}>"
+
+    async def __aenter__(self: Self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def max_delay(self) -> float:
+        return self._max_delay
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def submit(self, item: _T) -> _R:
+        if self._closed:
+            raise RuntimeError("Submitting an item after closing")
+        fut: asyncio.Future[_R] = asyncio.get_running_loop().create_future()
+        self._items.append(item)
+        self._futures.append(fut)
+        if len(self._items) >= self._max_size:
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                # The batch is kept for other callers, only this item leaves it.
+                if fut in self._futures:
+                    index = self._futures.index(fut)
+                    del self._items[index], self._futures[index]
+                fut.cancel()
+                raise
+        elif self._timer is None:
+            self._start_timer()
+        return await fut
+
+    async def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._items:
+            return
+        items, futures = self._items, self._futures
+        self._items, self._futures = [], []
+        try:
+            job = await self._scheduler.spawn(
+                partial(self._process, items, futures), name=self._name
+            )
+        except asyncio.CancelledError:
+            # The flushing caller is cancelled while waiting for a free slot,
+            # the batch goes back ahead of the items submitted meanwhile.
+            pending = [i for i, fut in enumerate(futures) if not fut.done()]
+            self._items[:0] = [items[i] for i in pending]
+            self._futures[:0] = [futures[i] for i in pending]
+            if self._items and self._timer is None:
+                self._start_timer()
+            raise
+        except BaseException as exc:
+            for fut in futures:
+                if fut.done():
+                    continue
+                if isinstance(exc, Exception):
+                    fut.set_exception(exc)
+                else:
+                    fut.cancel()
+            if isinstance(exc, Exception):
+                # Reported to the callers through their futures.
+                return
+            raise
+        self._jobs.add(job)
+        job._add_done_callback(self._jobs.discard)
+        job._add_done_callback(partial(_cancel_futures, futures))
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        await self.flush()
+        if self._jobs:
+            await asyncio.gather(
+                *(job.wait() for job in self._jobs), return_exceptions=True
+            )
+
+    def _start_timer(self) -> None:
+        self._timer = asyncio.get_running_loop().call_later(
+            self._max_delay, self._on_timer
+        )
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        # Tracked by the scheduler so wait_and_close() lets the flush finish.
+        self._scheduler.shield(self.flush())  # type: ignore[unused-awaitable]
+
+    async def _process(
+        self, items: List[_T], futures: "List[asyncio.Future[_R]]"
+    ) -> None:
+        try:
+            results = await self._batch_fn(items)
+            if len(results) != len(items):
+                raise ValueError(
+                    f"Batch function returned {len(results)} results "
+                    f"for {len(items)} items"
+                )
+        except Exception as exc:
+            for fut in futures:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for fut, result in zip(futures, results):
+            if not fut.done():
+                fut.set_result(result)
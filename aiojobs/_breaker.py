@@ -0,0 +1,194 @@
+import asyncio
+from collections import deque
+from collections.abc import Hashable
+from typing import Deque, Dict, Literal, NamedTuple, Optional
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitOpenError(Exception):
+    """Raised by Scheduler.spawn() when the circuit of a key is open."""
+
+    def __init__(self, key: Hashable):
+        super().__init__(f"Circuit {key!r} is open")
+        self.key = key
+
+
+class CircuitStats(NamedTuple):
+    state: CircuitState
+    calls: int
+    failures: int
+    rejected: int
+
+
+class _Circuit:
+    __slots__ = (
+        "state",
+        "outcomes",
+        "failures",
+        "opened_at",
+        "probes",
+        "rejected",
+        "running",
+    )
+
+    def __init__(self, window: int) -> None:
+        self.state: CircuitState = "closed"
+        # True for failures, the window is shared by successes and failures.
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.rejected = 0
+        # Admitted jobs which haven't reported an outcome yet.
+        self.running = 0
+
+
+class CircuitBreaker:
+    """Per key circuit breaker checked by Scheduler.spawn()."""
+
+    __slots__ = (
+        "_failure_threshold",
+        "_window",
+        "_min_calls",
+        "_reset_timeout",
+        "_half_open_max",
+        "_circuits",
+    )
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: float = 0.5,
+        window: int = 20,
+        min_calls: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max: int = 1,
+    ):
+        if not 0 < failure_threshold <= 1:
+            raise ValueError(
+                f"failure_threshold should be in (0, 1] range, "
+                f"got {failure_threshold!r}"
+            )
+        if window < 1 or min_calls < 1 or half_open_max < 1:
+            raise ValueError("window, min_calls and half_open_max should be positive")
+        self._failure_threshold = failure_threshold
+        self._window = window
+        self._min_calls = min_calls
+        self._reset_timeout = reset_timeout
+        self._half_open_max = half_open_max
+        self._circuits: Dict[Hashable, _Circuit] = {}
+
+    @property
+    def failure_threshold(self) -> float:
+        return self._failure_threshold
+
+    @property
+    def window(self) -> int:
+        return self._window
+
+    @property
+    def min_calls(self) -> int:
+        return self._min_calls
+
+    @property
+    def reset_timeout(self) -> float:
+        return self._reset_timeout
+
+    @property
+    def half_open_max(self) -> int:
+        return self._half_open_max
+
+    def state(self, key: Hashable) -> CircuitState:
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            return "closed"
+        return circuit.state
+
+    def stats(self) -> Dict[Hashable, CircuitStats]:
+        return {
+            key: CircuitStats(
+                circuit.state,
+                len(circuit.outcomes),
+                circuit.failures,
+                circuit.rejected,
+            )
+            for key, circuit in self._circuits.items()
+        }
+
+    def reset(self, key: Optional[Hashable] = None) -> None:
+        if key is None:
+            self._circuits.clear()
+        else:
+            self._circuits.pop(key, None)
+
+    def _admit(self, key: Hashable) -> bool:
+        # Return True if the admitted job is a probe of a half-open circuit.
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit(self._window)
+        if circuit.state == "closed":
+            circuit.running += 1
+            return False
+        if circuit.state == "open":
+            now = asyncio.get_running_loop().time()
+            if now - circuit.opened_at < self._reset_timeout:
+                circuit.rejected += 1
+                raise CircuitOpenError(key)
+            circuit.state = "half_open"
+            circuit.probes = 0
+        if circuit.probes >= self._half_open_max:
+            circuit.rejected += 1
+            raise CircuitOpenError(key)
+        circuit.probes += 1
+        circuit.running += 1
+        return True
+
+    def _record(self, key: Hashable, probe: bool, failed: Optional[bool]) -> None:
+        # failed is None for jobs which finished without an outcome,
+        # e.g. cancelled ones.
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            return
+        circuit.running -= 1
+        self._update(circuit, probe, failed)
+        if not circuit.running and circuit.state == "closed" and not circuit.outcomes:
+            # Nothing to remember, keys don't pile up.
+            del self._circuits[key]
+
+    def _update(self, circuit: _Circuit, probe: bool, failed: Optional[bool]) -> None:
+        if probe:
+            if circuit.state != "half_open":
+                return
+            circuit.probes -= 1
+            if failed is None:
+                return
+            if failed:
+                self._open(circuit)
+            else:
+                circuit.state = "closed"
+                circuit.outcomes.clear()
+                circuit.failures = 0
+            return
+        # Outcomes of jobs admitted before the circuit has been opened
+        # are stale.
+        if failed is None or circuit.state != "closed":
+            return
+        outcomes = circuit.outcomes
+        if len(outcomes) == outcomes.maxlen and outcomes[0]:
+            circuit.failures -= 1
+        outcomes.append(failed)
+        if failed:
+            circuit.failures += 1
+            if len(
+                outcomes
+            ) >= self._min_calls and circuit.failures >= self._failure_threshold * len(
+                outcomes
+            ):
+                self._open(circuit)
+
+    def _open(self, circuit: _Circuit) -> None:
+        circuit.state = "open"
+        circuit.opened_at = asyncio.get_running_loop().time()
+        circuit.outcomes.clear()
+        circuit.failures = 0
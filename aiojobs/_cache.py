@@ -0,0 +1,82 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from ._job import Job
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class ResultCache:
+    """LRU cache of finished jobs with a per entry time to live."""
+
+    __slots__ = ("_maxsize", "_entries", "_watched", "_hits", "_misses", "_evictions")
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize < 0:
+            raise ValueError(f"maxsize should be non-negative, got {maxsize!r}")
+        self._maxsize = maxsize
+        # key -> (finished job, expiration time)
+        self._entries: OrderedDict[Hashable, Tuple[Job[Any], float]] = OrderedDict()
+        # key -> (running or pending job, ttl, cache failures)
+        self._watched: Dict[Hashable, Tuple[Job[Any], float, bool]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            self._hits, self._misses, self._evictions, self._maxsize, len(self)
+        )
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get(self, key: Hashable) -> Optional[Job[Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            job, expires = entry
+            if expires > asyncio.get_running_loop().time():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return job
+            del self._entries[key]
+        self._misses += 1
+        return None
+
+    def watch(self, job: Job[Any], ttl: float, cache_failures: bool) -> None:
+        key = job._dedup_key
+        assert key is not None
+        if key not in self._watched:
+            self._watched[key] = (job, ttl, cache_failures)
+
+    def job_done(self, job: Job[Any]) -> None:
+        key = job._dedup_key
+        watched = self._watched.get(key)
+        if watched is None or watched[0] is not job:
+            return
+        del self._watched[key]
+        _, ttl, cache_failures = watched
+        task = job._task
+        if task is None or task.cancelled():
+            # Shed or cancelled jobs have no result to remember.
+            return
+        if task.exception() is not None and not cache_failures:
+            return
+        if self._maxsize == 0:
+            return
+        self._entries[key] = (job, asyncio.get_running_loop().time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
@@ -1,20 +1,43 @@
 import asyncio
+import contextvars
 import sys
 import traceback
-from collections.abc import Coroutine
-from typing import TYPE_CHECKING, Generic, Optional, TypeVar
+import weakref
+from collections.abc import Coroutine, Hashable
+from contextlib import suppress
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    FrozenSet,
+    Generic,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
 
 if sys.version_info >= (3, 11):
     from asyncio import timeout as asyncio_timeout
 else:
     from async_timeout import timeout as asyncio_timeout
 
+from ._retry import RetryPolicy
+from ._store import JobSpec
+
 if TYPE_CHECKING:
     from ._scheduler import Scheduler
 else:
     Scheduler = None
 
 _T = TypeVar("_T", covariant=True)
+JobStatus = Literal["pending", "active", "done", "failed", "cancelled"]
+ResultPolicy = Literal["keep", "drop", "weak"]
+
+# Shared by untagged jobs, frozenset() allocates a new object per call.
+_NO_TAGS: FrozenSet[Hashable] = frozenset()
 
 
 class Job(Generic[_T]):
@@ -22,30 +45,76 @@ class Job(Generic[_T]):
         "_coro",
         "_scheduler",
         "_name",
+        "_dedup_key",
+        "_tags",
+        "_attempts",
+        "_breaker",
+        "_spec",
         "_started",
         "_closed",
         "_explicit",
         "_task",
+        "_task_ref",
+        "_result_policy",
+        "_context",
+        "_status",
+        "_created_at",
+        "_started_at",
+        "_finished_at",
+        "_callbacks",
         "_source_traceback",
     )
 
     def __init__(
         self,
-        coro: Coroutine[object, object, _T],
+        coro: Union[
+            Coroutine[object, object, _T], Callable[[], Coroutine[object, object, _T]]
+        ],
         scheduler: Scheduler,
         name: Optional[str] = None,
+        dedup_key: Optional[Hashable] = None,
+        retry: Optional[RetryPolicy] = None,
+        tags: FrozenSet[Hashable] = _NO_TAGS,
+        result_policy: ResultPolicy = "keep",
+        context: Optional[contextvars.Context] = None,
     ):
-        self._coro = coro
+        if retry is None:
+            self._coro = cast(Coroutine[object, object, _T], coro)
+        else:
+            # A fresh coroutine is created by the factory for every attempt.
+            factory = cast(Callable[[], Coroutine[object, object, _T]], coro)
+            self._coro = self._retrying(factory, retry)
         self._scheduler: Optional[Scheduler] = scheduler
         self._name = name
-        loop = asyncio.get_running_loop()
-        self._started = loop.create_future()
+        self._dedup_key = dedup_key
+        self._tags = tags
+        self._attempts = 1
+        self._breaker: Optional[Tuple[Hashable, bool]] = None
+        # Set for jobs submitted by Scheduler.defer().
+        self._spec: Optional[JobSpec] = None
+        # Created on demand for waiters of a pending job, the task is
+        # passed through it since it may be released by the result policy
+        # before the waiters wake up.
+        self._started: Optional[asyncio.Future["asyncio.Task[_T]"]] = None
 
         self._closed = False
         self._explicit = False
         self._task: Optional[asyncio.Task[_T]] = None
+        self._task_ref: Optional[weakref.ref[asyncio.Task[_T]]] = None
+        self._result_policy = result_policy
+        self._context = context
+        # Terminal status, the task may be released once it is set.
+        self._status: Optional[JobStatus] = None
+        # Recorded by schedulers with metrics only.
+        self._created_at: Optional[float] = None
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._callbacks: Optional[List[Callable[["Job[_T]"], None]]] = None
 
-        tb = traceback.extract_stack(sys._getframe(2)) if loop.get_debug() else None
+        if asyncio.get_running_loop().get_debug():
+            tb = traceback.extract_stack(sys._getframe(2))
+        else:
+            tb = None
         self._source_traceback = tb
 
     def __repr__(self) -> str:
@@ -71,6 +140,28 @@ class Job(Generic[_T]):
     def closed(self) -> bool:
         return self._closed
 
+    @property
+    def attempts(self) -> int:
+        return self._attempts
+
+    @property
+    def tags(self) -> FrozenSet[Hashable]:
+        return self._tags
+
+    @property
+    def status(self) -> JobStatus:
+        if self._status is not None:
+            return self._status
+        return "pending" if self._task is None else "active"
+
+    @property
+    def started_at(self) -> Optional[float]:
+        return self._started_at
+
+    @property
+    def finished_at(self) -> Optional[float]:
+        return self._finished_at
+
     def get_name(self) -> Optional[str]:
         """Get the task name.
 
@@ -86,10 +177,25 @@ class Job(Generic[_T]):
 
     async def _do_wait(self, timeout: Optional[float]) -> _T:
         async with asyncio_timeout(timeout):
-            # TODO: add a test for waiting for a pending coro
-            await self._started
-            assert self._task is not None  # Task should have been created before this.
-            return await self._task
+            if self._task is None and self._status is None:
+                # Wait for the pending job to be started.
+                if self._started is None:
+                    self._started = asyncio.get_running_loop().create_future()
+                task = await self._started
+                return await task
+            return await self._finished_task()
+
+    async def _join(self) -> _T:
+        # A lean wait() without a timeout: the task is shielded directly
+        # instead of running _do_wait() in another task.
+        self._explicit = True
+        if self._task is None and self._status is None:
+            if self._started is None:
+                self._started = asyncio.get_running_loop().create_future()
+            task = await asyncio.shield(self._started)
+        else:
+            task = self._finished_task()
+        return await asyncio.shield(task)
 
     async def _wait(self, *, timeout: Optional[float] = None) -> _T:
         assert self._scheduler is not None  # Only removed when not _closed.
@@ -105,8 +211,7 @@ class Job(Generic[_T]):
 
     async def wait(self, *, timeout: Optional[float] = None) -> _T:
         if self._closed:
-            assert self._task is not None  # Task must have been created if closed.
-            return await self._task
+            return await self._finished_task()
         self._explicit = True
         return await self._wait(timeout=timeout)
 
@@ -122,11 +227,13 @@ class Job(Generic[_T]):
     async def _close(self, timeout: Optional[float]) -> None:
         self._closed = True
         if self._task is None:
-            # the task is closed immediately without actual execution
-            # it prevents a warning like
-            # RuntimeWarning: coroutine 'coro' was never awaited
-            self._start()
-            assert self._task is not None
+            if self._status is not None:
+                # The job has finished and its task is released.
+                return
+            # the job is closed immediately without actual execution
+            assert self._scheduler is not None
+            self._scheduler._close_pending(self)
+            return
         self._task.cancel()
         # self._scheduler is None after _done_callback()
         scheduler = self._scheduler
@@ -157,41 +264,124 @@ class Job(Generic[_T]):
         except asyncio.TimeoutError as exc:
             if self._explicit:
                 raise
-            context = {
-                "message": "Job closing timed out",
-                "job": self,
-                "exception": exc,
-            }
-            if self._source_traceback is not None:
-                context["source_traceback"] = self._source_traceback
             # scheduler is only None if job was already finished, in which case
             # there's no timeout. self._scheduler will now be None though.
             assert scheduler is not None
-            scheduler.call_exception_handler(context)
+            self._report_close_timeout(scheduler, exc)
         except Exception:
             if self._explicit:
                 raise
 
+    async def _retrying(
+        self, factory: Callable[[], Coroutine[object, object, _T]], retry: RetryPolicy
+    ) -> _T:
+        while True:
+            try:
+                return await factory()
+            except Exception as exc:
+                if not retry.should_retry(exc, self._attempts):
+                    raise
+            assert self._scheduler is not None
+            await self._scheduler._backoff(retry.delay(self._attempts))
+            self._attempts += 1
+
+    def _finished_task(self) -> "asyncio.Task[_T]":
+        task = self._task
+        if task is None and self._task_ref is not None:
+            task = self._task_ref()
+        if task is None:
+            if self._status is None or self._status == "cancelled":
+                # The job was closed without running.
+                raise asyncio.CancelledError()
+            raise RuntimeError(
+                f"Result of the job has been released by {self._result_policy!r} "
+                f"result policy"
+            )
+        return task
+
     def _start(self) -> None:
         assert self._task is None
-        self._task = asyncio.create_task(self._coro, name=self._name)
+        loop = asyncio.get_running_loop()
+        self._started_at = loop.time()
+        scheduler = self._scheduler
+        assert scheduler is not None
+        if scheduler._task_factory is None and self._context is None:
+            self._task = loop.create_task(self._coro, name=self._name)
+        else:
+            self._task = scheduler._create_task(self._coro, self._name, self._context)
         self._task.add_done_callback(self._done_callback)
-        self._started.set_result(None)
+        if self._started is not None:
+            self._started.set_result(self._task)
+
+    def _close_pending(self) -> None:
+        # Close a job which has never been started without creating a task
+        # for it; closing the coroutine prevents a "never awaited" warning.
+        assert self._task is None
+        self._closed = True
+        self._coro.close()
+        if self._started is not None:
+            self._started.cancel()
+        self._status = "cancelled"
+        self._finished_at = asyncio.get_running_loop().time()
+        self._scheduler = None
+        self._run_callbacks()
+
+    def _add_done_callback(self, fn: Callable[["Job[_T]"], None]) -> None:
+        # Internal hook called once the job has finished in any way,
+        # including jobs closed without ever being started.
+        if self._closed and self._scheduler is None:
+            fn(self)
+        elif self._callbacks is None:
+            self._callbacks = [fn]
+        else:
+            self._callbacks.append(fn)
+
+    def _remove_done_callback(self, fn: Callable[["Job[_T]"], None]) -> None:
+        if self._callbacks is not None:
+            with suppress(ValueError):
+                self._callbacks.remove(fn)
+
+    def _run_callbacks(self) -> None:
+        callbacks = self._callbacks
+        if callbacks is not None:
+            self._callbacks = None
+            for fn in callbacks:
+                fn(self)
 
     def _done_callback(self, task: "asyncio.Task[_T]") -> None:
         assert self._scheduler is not None
+        self._finished_at = task.get_loop().time()
+        if task.cancelled():
+            self._status = "cancelled"
+        elif task.exception() is not None:
+            self._status = "failed"
+        else:
+            self._status = "done"
         scheduler = self._scheduler
         scheduler._done(self)
-        try:
+        if self._status == "failed" and not self._explicit:
             exc = task.exception()
-        except asyncio.CancelledError:
-            pass
-        else:
-            if exc is not None and not self._explicit:
-                self._report_exception(exc)
-                scheduler._failed_tasks.put_nowait(task)
+            assert exc is not None
+            self._report_exception(exc)
+            scheduler._failed_tasks.put_nowait(task)
         self._scheduler = None  # drop backref
         self._closed = True
+        self._run_callbacks()
+        if self._result_policy != "keep":
+            # Keep the status and timing only, the task holds the result
+            # or the exception with its traceback.
+            if self._result_policy == "weak":
+                self._task_ref = weakref.ref(task)
+            self._name = task.get_name()
+            self._task = None
+
+    def _report_close_timeout(
+        self, scheduler: Scheduler, exc: asyncio.TimeoutError
+    ) -> None:
+        context = {"message": "Job closing timed out", "job": self, "exception": exc}
+        if self._source_traceback is not None:
+            context["source_traceback"] = self._source_traceback
+        scheduler.call_exception_handler(context)
 
     def _report_exception(self, exc: BaseException) -> None:
         assert self._scheduler is not None
@@ -0,0 +1,126 @@
+import asyncio
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from ._job import Job
+    from ._scheduler import Scheduler
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed buckets histogram updated in O(log(buckets))."""
+
+    __slots__ = ("_buckets", "_counts", "_sum", "_count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        if not buckets or list(buckets) != sorted(set(buckets)):
+            raise ValueError(f"Buckets should be sorted and unique, got {buckets!r}")
+        self._buckets = tuple(buckets)
+        # The last counter is for the +Inf bucket.
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._buckets, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        result = []
+        total = 0
+        for bound, count in zip(self._buckets + (float("inf"),), self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class SchedulerMetrics:
+    """Counters and histograms of a scheduler, updated as jobs come and go."""
+
+    __slots__ = (
+        "spawned",
+        "completed",
+        "failed",
+        "cancelled",
+        "queue_wait",
+        "run_time",
+    )
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.spawned = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.queue_wait = Histogram(buckets)
+        self.run_time = Histogram(buckets)
+
+    def _job_spawned(self, job: "Job[Any]") -> None:
+        self.spawned += 1
+        job._created_at = asyncio.get_running_loop().time()
+
+    def _job_done(self, job: "Job[Any]") -> None:
+        status = job._status
+        if status == "done":
+            self.completed += 1
+        elif status == "failed":
+            self.failed += 1
+        else:
+            # Jobs closed before they have been started have no status yet.
+            self.cancelled += 1
+        started_at = job._started_at
+        if started_at is not None and job._created_at is not None:
+            self.queue_wait.observe(started_at - job._created_at)
+            if job._finished_at is not None:
+                self.run_time.observe(job._finished_at - started_at)
+
+
+def render_prometheus(scheduler: "Scheduler", prefix: str = "aiojobs") -> str:
+    """Render scheduler statistics in Prometheus text exposition format."""
+    lines: List[str] = []
+
+    def metric(name: str, kind: str, doc: str, value: float) -> None:
+        lines.append(f"# HELP {prefix}_{name} {doc}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        lines.append(f"{prefix}_{name} {value}")
+
+    def histogram(name: str, doc: str, hist: Histogram) -> None:
+        lines.append(f"# HELP {prefix}_{name} {doc}")
+        lines.append(f"# TYPE {prefix}_{name} histogram")
+        for bound, count in hist.cumulative():
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{prefix}_{name}_bucket{{le="{le}"}} {count}')
+        lines.append(f"{prefix}_{name}_sum {hist.sum}")
+        lines.append(f"{prefix}_{name}_count {hist.count}")
+
+    metric("active_jobs", "gauge", "Running jobs.", scheduler.active_count)
+    metric("pending_jobs", "gauge", "Jobs waiting for a slot.", scheduler.pending_count)
+    if scheduler.limit is not None:
+        metric("limit", "gauge", "Concurrency limit.", scheduler.limit)
+    metric(
+        "shed_total", "counter", "Jobs shed by overflow policy.", scheduler.shed_count
+    )
+    metric("retries_total", "counter", "Retried job attempts.", scheduler.retry_count)
+    metrics = scheduler.metrics
+    if metrics is not None:
+        metric("spawned_total", "counter", "Spawned jobs.", metrics.spawned)
+        metric("completed_total", "counter", "Successful jobs.", metrics.completed)
+        metric("failed_total", "counter", "Failed jobs.", metrics.failed)
+        metric("cancelled_total", "counter", "Cancelled jobs.", metrics.cancelled)
+        histogram(
+            "queue_wait_seconds",
+            "Time between spawning and starting of jobs.",
+            metrics.queue_wait,
+        )
+        histogram("run_seconds", "Run time of jobs.", metrics.run_time)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,162 @@
+import asyncio
+from collections import OrderedDict, deque
+from collections.abc import Hashable, Mapping
+from typing import TYPE_CHECKING, Deque, Dict, Optional
+
+if TYPE_CHECKING:
+    from ._job import Job
+
+
+class PendingQueue:
+    """FIFO of jobs waiting for a concurrency slot.
+
+    Unlike asyncio.Queue it supports removal of an arbitrary job in O(1),
+    a closed pending job releases its slot immediately.
+    """
+
+    __slots__ = ("_maxsize", "_jobs", "_putters")
+
+    def __init__(self, maxsize: int = 0) -> None:
+        self._maxsize = maxsize
+        # Jobs are mapped to their tenants.
+        self._jobs: "OrderedDict[Job[object], Hashable]" = OrderedDict()
+        self._putters: Deque[asyncio.Future[None]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __contains__(self, job: object) -> bool:
+        return job in self._jobs
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    def qsize(self) -> int:
+        return len(self._jobs)
+
+    def empty(self) -> bool:
+        return not self._jobs
+
+    def full(self) -> bool:
+        return 0 < self._maxsize <= len(self._jobs)
+
+    async def put(self, job: "Job[object]", tenant: Hashable = None) -> None:
+        while self.full():
+            putter = asyncio.get_running_loop().create_future()
+            self._putters.append(putter)
+            try:
+                await putter
+            except BaseException:
+                putter.cancel()
+                try:
+                    self._putters.remove(putter)
+                except ValueError:
+                    # The putter was woken up, pass the slot on.
+                    if not self.full():
+                        self._wakeup_next()
+                raise
+        self.put_nowait(job, tenant)
+
+    def put_nowait(self, job: "Job[object]", tenant: Hashable = None) -> None:
+        if self.full():
+            raise asyncio.QueueFull
+        self._jobs[job] = tenant
+
+    def get_nowait(self) -> "Job[object]":
+        if not self._jobs:
+            raise asyncio.QueueEmpty
+        job, _ = self._jobs.popitem(last=False)
+        self._wakeup_next()
+        return job
+
+    def evict(self) -> "Job[object]":
+        """Remove a job making room for a new one, the oldest one."""
+        return self.get_nowait()
+
+    def remove(self, job: "Job[object]") -> bool:
+        if job not in self._jobs:
+            return False
+        del self._jobs[job]
+        self._wakeup_next()
+        return True
+
+    def _wakeup_next(self) -> None:
+        while self._putters:
+            putter = self._putters.popleft()
+            if not putter.done():
+                putter.set_result(None)
+                break
+
+
+class FairPendingQueue(PendingQueue):
+    """Pending jobs queued per tenant and served by deficit round-robin.
+
+    A tenant takes as many jobs per turn as its weight (1 by default), a
+    flood of jobs of one tenant delays others for a round at most. Every
+    operation except evict() is O(1).
+    """
+
+    __slots__ = ("_weights", "_queues", "_deficits")
+
+    def __init__(
+        self, maxsize: int = 0, weights: Optional[Mapping[Hashable, int]] = None
+    ) -> None:
+        super().__init__(maxsize)
+        self._weights = dict(weights or {})
+        # Tenants with queued jobs in the round order.
+        self._queues: "OrderedDict[Hashable, OrderedDict[Job[object], None]]" = (
+            OrderedDict()
+        )
+        self._deficits: Dict[Hashable, int] = {}
+
+    def put_nowait(self, job: "Job[object]", tenant: Hashable = None) -> None:
+        super().put_nowait(job, tenant)
+        queue = self._queues.get(tenant)
+        if queue is None:
+            queue = self._queues[tenant] = OrderedDict()
+        queue[job] = None
+
+    def get_nowait(self) -> "Job[object]":
+        if not self._jobs:
+            raise asyncio.QueueEmpty
+        tenant, queue = next(iter(self._queues.items()))
+        deficit = self._deficits.get(tenant, 0)
+        if deficit <= 0:
+            # The tenant starts a new turn.
+            deficit = self._weights.get(tenant, 1)
+        job, _ = queue.popitem(last=False)
+        del self._jobs[job]
+        if not queue:
+            self._drop_tenant(tenant)
+        elif deficit > 1:
+            self._deficits[tenant] = deficit - 1
+        else:
+            self._deficits.pop(tenant, None)
+            self._queues.move_to_end(tenant)
+        self._wakeup_next()
+        return job
+
+    def evict(self) -> "Job[object]":
+        """Remove the oldest job of the tenant with the most queued jobs."""
+        if not self._jobs:
+            raise asyncio.QueueEmpty
+        tenant = max(self._queues, key=lambda key: len(self._queues[key]))
+        job = next(iter(self._queues[tenant]))
+        self.remove(job)
+        return job
+
+    def remove(self, job: "Job[object]") -> bool:
+        if job not in self._jobs:
+            return False
+        tenant = self._jobs.pop(job)
+        queue = self._queues[tenant]
+        del queue[job]
+        if not queue:
+            self._drop_tenant(tenant)
+        self._wakeup_next()
+        return True
+
+    def _drop_tenant(self, tenant: Hashable) -> None:
+        del self._queues[tenant]
+        self._deficits.pop(tenant, None)
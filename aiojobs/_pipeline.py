@@ -0,0 +1,217 @@
+import asyncio
+import sys
+from collections.abc import Awaitable, Sequence
+from contextlib import suppress
+from functools import partial
+from types import TracebackType
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple, Type, TypeVar
+
+from ._scheduler import ExceptionHandler, Scheduler
+
+if sys.version_info >= (3, 11):
+    from asyncio import timeout as asyncio_timeout
+    from typing import Self
+else:
+    from async_timeout import timeout as asyncio_timeout
+
+    Self = TypeVar("Self", bound="Pipeline")
+
+StageFunction = Callable[[Any], Awaitable[Any]]
+
+
+class Stage(NamedTuple):
+    """A step of Pipeline processing items by up to limit concurrent jobs."""
+
+    fn: StageFunction
+    limit: int = 10
+    queue_size: int = 100
+    name: Optional[str] = None
+
+
+class StageStats(NamedTuple):
+    name: str
+    queued: int
+    active: int
+    processed: int
+    failed: int
+    throughput: float
+    mean_latency: float
+
+
+class _StageRunner:
+    __slots__ = (
+        "name",
+        "fn",
+        "queue",
+        "scheduler",
+        "feeder",
+        "processed",
+        "failed",
+        "latency",
+    )
+
+    def __init__(
+        self,
+        stage: Stage,
+        index: int,
+        exception_handler: Optional[ExceptionHandler],
+        close_timeout: Optional[float],
+    ) -> None:
+        if stage.limit < 1:
+            raise ValueError(f"limit should be positive, got {stage.limit!r}")
+        if stage.queue_size < 1:
+            raise ValueError(f"queue_size should be positive, got {stage.queue_size!r}")
+        self.name = stage.name or f"stage{index}"
+        self.fn = stage.fn
+        self.queue: asyncio.Queue[Any] = asyncio.Queue(stage.queue_size)
+        # A single pending job stops the feeder, the queue fills up then
+        # and blocks the upstream stage.
+        self.scheduler = Scheduler(
+            limit=stage.limit,
+            pending_limit=1,
+            exception_handler=exception_handler,
+            close_timeout=close_timeout,
+        )
+        self.feeder: Optional[asyncio.Task[None]] = None
+        self.processed = 0
+        self.failed = 0
+        self.latency = 0.0
+
+    async def stop_feeder(self) -> None:
+        feeder = self.feeder
+        if feeder is not None:
+            self.feeder = None
+            feeder.cancel()
+            with suppress(asyncio.CancelledError):
+                await feeder
+
+
+class Pipeline:
+    """Chain of stages connected by bounded queues, each run by a scheduler."""
+
+    __slots__ = ("_runners", "_wait_timeout", "_started_at", "_closed")
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        *,
+        exception_handler: Optional[ExceptionHandler] = None,
+        close_timeout: Optional[float] = 0.1,
+        wait_timeout: Optional[float] = 60,
+    ):
+        if not stages:
+            raise ValueError("Pipeline requires at least one stage")
+        self._runners = [
+            _StageRunner(stage, index, exception_handler, close_timeout)
+            for index, stage in enumerate(stages)
+        ]
+        self._wait_timeout = wait_timeout
+        self._started_at: Optional[float] = None
+        self._closed = False
+
+    def __repr__(self) -> str:
+        state = "closed " if self._closed else ""
+        names = " -> ".join(runner.name for runner in self._runners)
+        return f"<Pipeline {state}{names}>"
+
+    async def __aenter__(self: Self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self.wait_and_close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def wait_timeout(self) -> Optional[float]:
+        return self._wait_timeout
+
+    @property
+    def schedulers(self) -> Tuple[Scheduler, ...]:
+        return tuple(runner.scheduler for runner in self._runners)
+
+    async def put(self, item: Any) -> None:
+        if self._closed:
+            raise RuntimeError("Putting an item after closing")
+        if self._started_at is None:
+            self._started_at = asyncio.get_running_loop().time()
+            for index, runner in enumerate(self._runners):
+                runner.feeder = asyncio.create_task(self._feed(index))
+        await self._runners[0].queue.put(item)
+
+    def stats(self) -> List[StageStats]:
+        elapsed = 0.0
+        if self._started_at is not None:
+            elapsed = asyncio.get_running_loop().time() - self._started_at
+        return [
+            StageStats(
+                runner.name,
+                runner.queue.qsize() + runner.scheduler.pending_count,
+                runner.scheduler.active_count,
+                runner.processed,
+                runner.failed,
+                runner.processed / elapsed if elapsed else 0.0,
+                runner.latency / runner.processed if runner.processed else 0.0,
+            )
+            for runner in self._runners
+        ]
+
+    async def close(self) -> None:
+        self._closed = True
+        # Upstream stages go first, they don't feed closed stages then.
+        for runner in self._runners:
+            await runner.stop_feeder()
+            await runner.scheduler.close()
+
+    async def wait_and_close(self, timeout: Optional[float] = None) -> None:
+        self._closed = True
+        if timeout is None:
+            timeout = self._wait_timeout
+        try:
+            async with asyncio_timeout(timeout):
+                for runner in self._runners:
+                    # Items of a stage are passed downstream before its
+                    # queue is done.
+                    await runner.queue.join()
+                    await runner.stop_feeder()
+                    await runner.scheduler.wait_and_close()
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            await self.close()
+
+    async def _feed(self, index: int) -> None:
+        runner = self._runners[index]
+        while True:
+            item = await runner.queue.get()
+            try:
+                await runner.scheduler.spawn(partial(self._process, index, item))
+            except BaseException:
+                runner.queue.task_done()
+                raise
+
+    async def _process(self, index: int, item: Any) -> None:
+        runner = self._runners[index]
+        loop = asyncio.get_running_loop()
+        try:
+            start = loop.time()
+            try:
+                result = await runner.fn(item)
+            except Exception:
+                # Reported by the exception handler of the stage scheduler.
+                runner.failed += 1
+                raise
+            runner.latency += loop.time() - start
+            runner.processed += 1
+            if index + 1 < len(self._runners):
+                # Waiting for a room downstream keeps the slot busy.
+                await self._runners[index + 1].queue.put(result)
+        finally:
+            runner.queue.task_done()
@@ -0,0 +1,91 @@
+import math
+import random
+from typing import Tuple, Type, Union
+
+_ExcTypes = Union[Type[BaseException], Tuple[Type[BaseException], ...]]
+
+
+class RetryPolicy:
+    """Describe how a failed job is retried."""
+
+    __slots__ = (
+        "_max_attempts",
+        "_backoff",
+        "_multiplier",
+        "_max_backoff",
+        "_jitter",
+        "_retry_on",
+        "_max_exponent",
+    )
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        *,
+        backoff: float = 0.1,
+        multiplier: float = 2.0,
+        max_backoff: float = 10.0,
+        jitter: float = 0.1,
+        retry_on: _ExcTypes = Exception,
+    ):
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts should be positive, got {max_attempts!r}")
+        if backoff < 0 or max_backoff < 0:
+            raise ValueError("backoff and max_backoff should be non-negative")
+        if multiplier < 1:
+            raise ValueError(f"multiplier should be at least 1, got {multiplier!r}")
+        if not 0 <= jitter <= 1:
+            raise ValueError(f"jitter should be in [0, 1] range, got {jitter!r}")
+        self._max_attempts = max_attempts
+        self._backoff = backoff
+        self._multiplier = multiplier
+        self._max_backoff = max_backoff
+        self._jitter = jitter
+        self._retry_on = retry_on
+        # The delay reaches max_backoff by this exponent, a larger one
+        # could only overflow.
+        if multiplier > 1 and 0 < backoff < max_backoff:
+            self._max_exponent = math.ceil(math.log(max_backoff / backoff, multiplier))
+        else:
+            self._max_exponent = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"<RetryPolicy max_attempts={self._max_attempts} "
+            f"backoff={self._backoff} multiplier={self._multiplier} "
+            f"max_backoff={self._max_backoff} jitter={self._jitter}>"
+        )
+
+    @property
+    def max_attempts(self) -> int:
+        return self._max_attempts
+
+    @property
+    def backoff(self) -> float:
+        return self._backoff
+
+    @property
+    def multiplier(self) -> float:
+        return self._multiplier
+
+    @property
+    def max_backoff(self) -> float:
+        return self._max_backoff
+
+    @property
+    def jitter(self) -> float:
+        return self._jitter
+
+    @property
+    def retry_on(self) -> _ExcTypes:
+        return self._retry_on
+
+    def should_retry(self, exc: BaseException, attempt: int) -> bool:
+        return attempt < self._max_attempts and isinstance(exc, self._retry_on)
+
+    def delay(self, attempt: int) -> float:
+        exponent = min(attempt - 1, self._max_exponent)
+        delay = min(self._backoff * self._multiplier**exponent, self._max_backoff)
+        if self._jitter:
+            delay *= 1 + random.uniform(-self._jitter, self._jitter)
+        return delay
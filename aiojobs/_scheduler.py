@@ -1,20 +1,43 @@
 import asyncio
+import contextvars
 import sys
-from collections.abc import Awaitable, Collection, Coroutine, Iterator
+from collections import OrderedDict, deque
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    Awaitable,
+    Collection,
+    Coroutine,
+    Hashable,
+    Iterable,
+    Iterator,
+    Mapping,
+)
 from contextlib import suppress
 from types import TracebackType
 from typing import (
     Any,
     Callable,
+    Deque,
     Dict,
+    FrozenSet,
+    List,
+    Literal,
     Optional,
     Set,
+    Tuple,
     Type,
     TypeVar,
     Union,
 )
 
-from ._job import Job
+from ._breaker import CircuitBreaker, CircuitOpenError
+from ._cache import CacheInfo, ResultCache
+from ._job import _NO_TAGS, Job, ResultPolicy
+from ._metrics import SchedulerMetrics
+from ._pending import FairPendingQueue, PendingQueue
+from ._retry import RetryPolicy
+from ._store import JobSpec, JobStore, dump_spec, load_spec
 
 if sys.version_info >= (3, 11):
     from asyncio import timeout as asyncio_timeout
@@ -25,8 +48,21 @@ else:
     Self = TypeVar("Self", bound="Scheduler")
 
 _T = TypeVar("_T")
+_R = TypeVar("_R")
 _FutureLike = Union["asyncio.Future[_T]", Awaitable[_T]]
+_CoroLike = Union[
+    Coroutine[object, object, _T], Callable[[], Coroutine[object, object, _T]]
+]
 ExceptionHandler = Callable[["Scheduler", Dict[str, Any]], None]
+WatermarkCallback = Callable[[], None]
+ProgressCallback = Callable[[int, int], None]
+TaskFactory = Callable[..., "asyncio.Task[Any]"]
+OverflowPolicy = Literal["block", "reject", "drop_oldest", "drop_newest"]
+PersistPolicy = Literal["never", "pending", "all"]
+
+_OVERFLOW_POLICIES = frozenset(("block", "reject", "drop_oldest", "drop_newest"))
+_PERSIST_POLICIES = frozenset(("never", "pending", "all"))
+_RESULT_POLICIES = frozenset(("keep", "drop", "weak"))
 
 
 class Scheduler(Collection[Job[object]]):
@@ -41,6 +77,32 @@ class Scheduler(Collection[Job[object]]):
         "_failed_tasks",
         "_failed_task",
         "_pending",
+        "_backoff_count",
+        "_retry_waiters",
+        "_retry_count",
+        "_dedup",
+        "_tags",
+        "_cache",
+        "_circuit_breaker",
+        "_job_store",
+        "_spill_threshold",
+        "_persist_on_close",
+        "_result_policy",
+        "_task_factory",
+        "_metrics",
+        "_parent",
+        "_children",
+        "_active",
+        "_children_active",
+        "_waiting_children",
+        "_overflow_policy",
+        "_shed_count",
+        "_high_watermark",
+        "_low_watermark",
+        "_watermark_callbacks",
+        "_congested",
+        "_capacity",
+        "_draining",
         "_closed",
     )
 
@@ -52,11 +114,62 @@ class Scheduler(Collection[Job[object]]):
         limit: Optional[int] = 100,
         pending_limit: int = 10000,
         exception_handler: Optional[ExceptionHandler] = None,
+        overflow_policy: OverflowPolicy = "block",
+        high_watermark: Optional[int] = None,
+        low_watermark: Optional[int] = None,
+        cache_size: int = 1024,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        job_store: Optional[JobStore] = None,
+        spill_threshold: int = 1000,
+        persist_on_close: PersistPolicy = "never",
+        result_policy: ResultPolicy = "keep",
+        task_factory: Optional[TaskFactory] = None,
+        metrics: bool = False,
+        parent: Optional["Scheduler"] = None,
+        fair_queue: bool = False,
+        tenant_weights: Optional[Mapping[Hashable, int]] = None,
     ):
         if exception_handler is not None and not callable(exception_handler):
             raise TypeError(
                 f"A callable object or None is expected, got {exception_handler!r}"
             )
+        if task_factory is not None and not callable(task_factory):
+            raise TypeError(
+                f"A callable object or None is expected, got {task_factory!r}"
+            )
+        if overflow_policy not in _OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow_policy!r}")
+        if result_policy not in _RESULT_POLICIES:
+            raise ValueError(f"Unknown result policy {result_policy!r}")
+        if persist_on_close not in _PERSIST_POLICIES:
+            raise ValueError(f"Unknown persist policy {persist_on_close!r}")
+        if persist_on_close != "never" and job_store is None:
+            raise ValueError("persist_on_close requires job_store")
+        if spill_threshold < 1:
+            raise ValueError(
+                f"spill_threshold should be positive, got {spill_threshold!r}"
+            )
+        if tenant_weights is not None:
+            if not fair_queue:
+                raise ValueError("tenant_weights requires fair_queue")
+            for tenant, weight in tenant_weights.items():
+                if weight < 1:
+                    raise ValueError(
+                        f"Weight of {tenant!r} should be positive, got {weight!r}"
+                    )
+        if parent is not None and parent.closed:
+            raise RuntimeError("Creating a child of a closed scheduler")
+        if high_watermark is None:
+            if low_watermark is not None:
+                raise ValueError("low_watermark requires high_watermark")
+        else:
+            if low_watermark is None:
+                low_watermark = high_watermark // 2
+            if not 0 <= low_watermark <= high_watermark:
+                raise ValueError(
+                    f"0 <= low_watermark <= high_watermark is expected, "
+                    f"got {low_watermark!r} and {high_watermark!r}"
+                )
 
         self._jobs: Set[Job[object]] = set()
         self._shields: Set[asyncio.Task[object]] = set()
@@ -70,7 +183,45 @@ class Scheduler(Collection[Job[object]]):
         self._failed_task: Optional[asyncio.Task[None]] = None
         if sys.version_info < (3, 10):
             self._failed_task = asyncio.create_task(self._wait_failed())
-        self._pending: asyncio.Queue[Job[object]] = asyncio.Queue(maxsize=pending_limit)
+        self._pending = (
+            FairPendingQueue(pending_limit, tenant_weights)
+            if fair_queue
+            else PendingQueue(pending_limit)
+        )
+        self._backoff_count = 0
+        self._retry_waiters: Deque[asyncio.Future[None]] = deque()
+        self._retry_count = 0
+        self._dedup: Dict[Hashable, Job[Any]] = {}
+        self._tags: Dict[Hashable, Set[Job[Any]]] = {}
+        self._cache = ResultCache(cache_size)
+        self._circuit_breaker = circuit_breaker
+        self._job_store = job_store
+        self._spill_threshold = spill_threshold
+        self._persist_on_close = persist_on_close
+        self._result_policy = result_policy
+        self._task_factory = task_factory
+        self._metrics = SchedulerMetrics() if metrics else None
+        self._parent = parent
+        self._children: "OrderedDict[Scheduler, None]" = OrderedDict()
+        # The active count reported to the ancestors, and the aggregate of
+        # the children, both updated incrementally by _sync().
+        self._active = 0
+        self._children_active = 0
+        # Children with pending jobs or retry waiters in their subtrees.
+        self._waiting_children: "OrderedDict[Scheduler, None]" = OrderedDict()
+        if parent is not None:
+            parent._children[self] = None
+        self._overflow_policy = overflow_policy
+        self._shed_count = 0
+        self._high_watermark = high_watermark
+        self._low_watermark = low_watermark
+        self._watermark_callbacks: Dict[
+            Tuple[WatermarkCallback, WatermarkCallback], None
+        ] = {}
+        self._congested = False
+        self._capacity = asyncio.Event()
+        self._capacity.set()
+        self._draining = False
         self._closed = False
 
     def __iter__(self) -> Iterator[Job[Any]]:
@@ -110,46 +261,345 @@ class Scheduler(Collection[Job[object]]):
     def pending_limit(self) -> int:
         return self._pending.maxsize
 
+    @property
+    def overflow_policy(self) -> OverflowPolicy:
+        return self._overflow_policy
+
+    @property
+    def circuit_breaker(self) -> Optional[CircuitBreaker]:
+        return self._circuit_breaker
+
+    @property
+    def job_store(self) -> Optional[JobStore]:
+        return self._job_store
+
+    @property
+    def spill_threshold(self) -> int:
+        return self._spill_threshold
+
+    @property
+    def persist_on_close(self) -> PersistPolicy:
+        return self._persist_on_close
+
+    @property
+    def result_policy(self) -> ResultPolicy:
+        return self._result_policy
+
+    @property
+    def task_factory(self) -> Optional[TaskFactory]:
+        return self._task_factory
+
+    @property
+    def metrics(self) -> Optional[SchedulerMetrics]:
+        return self._metrics
+
+    @property
+    def fair_queue(self) -> bool:
+        return isinstance(self._pending, FairPendingQueue)
+
+    @property
+    def parent(self) -> Optional["Scheduler"]:
+        return self._parent
+
+    @property
+    def children(self) -> Tuple["Scheduler", ...]:
+        return tuple(self._children)
+
+    @property
+    def total_active_count(self) -> int:
+        return self.active_count + self._children_active
+
+    @property
+    def total_pending_count(self) -> int:
+        count = self.pending_count
+        for child in self._children:
+            count += child.total_pending_count
+        return count
+
     @property
     def close_timeout(self) -> Optional[float]:
         return self._close_timeout
 
     @property
     def active_count(self) -> int:
-        return len(self._jobs) - self._pending.qsize()
+        return len(self._jobs) - self._pending.qsize() - self._backoff_count
 
     @property
     def pending_count(self) -> int:
         return self._pending.qsize()
 
+    @property
+    def spilled_count(self) -> int:
+        return 0 if self._job_store is None else len(self._job_store)
+
+    @property
+    def retry_count(self) -> int:
+        return self._retry_count
+
+    @property
+    def shed_count(self) -> int:
+        return self._shed_count
+
+    @property
+    def high_watermark(self) -> Optional[int]:
+        return self._high_watermark
+
+    @property
+    def low_watermark(self) -> Optional[int]:
+        return self._low_watermark
+
+    @property
+    def congested(self) -> bool:
+        return self._congested
+
     @property
     def closed(self) -> bool:
         return self._closed
 
+    @property
+    def draining(self) -> bool:
+        return self._draining
+
+    def add_watermark_callbacks(
+        self, on_high: WatermarkCallback, on_low: WatermarkCallback
+    ) -> None:
+        self._watermark_callbacks[(on_high, on_low)] = None
+
+    def remove_watermark_callbacks(
+        self, on_high: WatermarkCallback, on_low: WatermarkCallback
+    ) -> None:
+        del self._watermark_callbacks[(on_high, on_low)]
+
+    async def wait_for_capacity(self) -> None:
+        if self._congested:
+            await self._capacity.wait()
+
     async def spawn(
-        self, coro: Coroutine[object, object, _T], name: Optional[str] = None
+        self,
+        coro: _CoroLike[_T],
+        name: Optional[str] = None,
+        *,
+        dedup_key: Optional[Hashable] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker_key: Optional[Hashable] = None,
+        tags: Iterable[Hashable] = (),
+        result_policy: Optional[ResultPolicy] = None,
+        context: Optional[contextvars.Context] = None,
+        tenant: Optional[Hashable] = None,
     ) -> Job[_T]:
-        if self._closed:
-            raise RuntimeError("Scheduling a new job after closing")
-        if self._failed_task is None:
-            self._failed_task = asyncio.create_task(self._wait_failed())
-        else:
-            if self._failed_task.get_loop() is not asyncio.get_running_loop():
-                raise RuntimeError(f"{self!r} is bound to a different event loop")
-        job = Job(coro, self, name=name)
-        should_start = self._limit is None or self.active_count < self._limit
-        if should_start:
+        self._check_spawn()
+        if tenant is not None and not self.fair_queue:
+            raise ValueError("tenant requires fair_queue")
+        if result_policy is None:
+            result_policy = self._result_policy
+        elif result_policy not in _RESULT_POLICIES:
+            raise ValueError(f"Unknown result policy {result_policy!r}")
+        if retry is not None and not callable(coro):
+            raise TypeError("Retrying a job requires a coroutine factory")
+        if dedup_key is not None:
+            existing: Optional[Job[_T]] = self._dedup.get(dedup_key)
+            if existing is not None and not existing.closed:
+                if not callable(coro):
+                    coro.close()
+                return existing
+        breaker = self._circuit_breaker
+        probe = False
+        if breaker_key is not None:
+            if breaker is None:
+                raise ValueError("breaker_key requires a circuit_breaker")
+            try:
+                probe = breaker._admit(breaker_key)
+            except CircuitOpenError:
+                if not callable(coro):
+                    coro.close()
+                raise
+        try:
+            if retry is None and callable(coro):
+                coro = coro()
+            job = Job(
+                coro,
+                self,
+                name=name,
+                dedup_key=dedup_key,
+                retry=retry,
+                tags=frozenset(tags) if tags else _NO_TAGS,
+                result_policy=result_policy,
+                context=context,
+            )
+        except BaseException:
+            if breaker_key is not None:
+                assert breaker is not None
+                # Give the admission, e.g. a probe slot, back.
+                breaker._record(breaker_key, probe, None)
+            raise
+        if breaker_key is not None:
+            job._breaker = (breaker_key, probe)
+        if dedup_key is not None:
+            self._dedup[dedup_key] = job
+        for tag in job._tags:
+            self._tags.setdefault(tag, set()).add(job)
+        if self._metrics is not None:
+            self._metrics._job_spawned(job)
+        if self._has_capacity():
             job._start()
+        elif self._pending.full() and self._overflow_policy != "block":
+            if self._overflow_policy == "reject":
+                self._shed(job)
+                raise asyncio.QueueFull("Pending queue of the scheduler is full")
+            if self._overflow_policy == "drop_newest":
+                self._shed(job)
+                return job
+            self._shed(self._pending.evict())
+            self._pending.put_nowait(job, tenant)
         else:
             try:
                 # wait for free slot in queue
-                await self._pending.put(job)
+                await self._pending.put(job, tenant)
             except asyncio.CancelledError:
                 await job.close()
                 raise
+            if self._closed:
+                # The slot was freed by close(), the job is not admitted.
+                self._close_pending(job)
+                return job
         self._jobs.add(job)
+        self._sync()
+        if self._high_watermark is not None:
+            self._check_high_watermark()
+        return job
+
+    def jobs_by_tag(self, tag: Hashable) -> FrozenSet[Job[Any]]:
+        return frozenset(self._tags.get(tag, ()))
+
+    def count_by_tag(self, tag: Hashable) -> int:
+        return len(self._tags.get(tag, ()))
+
+    async def close_tagged(self, tag: Hashable) -> None:
+        jobs = self._tags.get(tag)
+        if jobs:
+            await asyncio.gather(
+                *(job.close() for job in list(jobs)), return_exceptions=True
+            )
+
+    async def as_completed(
+        self, jobs: Optional[Iterable[Job[Any]]] = None
+    ) -> AsyncGenerator[Job[Any], None]:
+        if jobs is None:
+            jobs = list(self._jobs)
+        done: "asyncio.Queue[Job[Any]]" = asyncio.Queue()
+        waiting = []
+        for job in jobs:
+            # Finished jobs are queued immediately.
+            job._add_done_callback(done.put_nowait)
+            waiting.append(job)
+        try:
+            for _ in range(len(waiting)):
+                yield await done.get()
+        finally:
+            for job in waiting:
+                job._remove_done_callback(done.put_nowait)
+
+    async def map(
+        self,
+        fn: Callable[[_T], Coroutine[object, object, _R]],
+        aiterable: AsyncIterable[_T],
+        *,
+        ordered: bool = False,
+        window: int = 100,
+    ) -> AsyncGenerator[_R, None]:
+        if window < 1:
+            raise ValueError(f"window should be positive, got {window!r}")
+        items = aiterable.__aiter__()
+        exhausted = False
+        # Jobs in input order, unordered results are taken from done.
+        running: "OrderedDict[Job[_R], None]" = OrderedDict()
+        done: "asyncio.Queue[Job[_R]]" = asyncio.Queue()
+        try:
+            while True:
+                # Items are pulled only when there is a room in the window.
+                while not exhausted and len(running) < window:
+                    try:
+                        item = await items.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    # Results are read once the jobs have finished.
+                    job = await self.spawn(fn(item), result_policy="keep")
+                    if not ordered:
+                        job._add_done_callback(done.put_nowait)
+                    running[job] = None
+                if not running:
+                    return
+                if ordered:
+                    job, _ = running.popitem(last=False)
+                else:
+                    job = await done.get()
+                    del running[job]
+                yield await job.wait()
+        finally:
+            if running:
+                await asyncio.gather(
+                    *(job.close() for job in running), return_exceptions=True
+                )
+
+    def defer(
+        self,
+        fn: Callable[..., Coroutine[object, object, object]],
+        /,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        self._check_spawn()
+        store = self._job_store
+        if store is None:
+            raise RuntimeError("Deferring jobs requires a job_store")
+        if not len(store) and (
+            self._has_capacity()
+            or (self.pending_count < self._spill_threshold and not self._pending.full())
+        ):
+            self._spawn_nowait((fn, args, kwargs))
+        else:
+            store.push((dump_spec((fn, args, kwargs)),))
+            # Nothing may be running to page the backlog in otherwise.
+            self._refill()
+
+    def restore(self) -> int:
+        self._check_spawn()
+        store = self._job_store
+        if store is None:
+            raise RuntimeError("Restoring jobs requires a job_store")
+        count = len(store)
+        self._refill()
+        return count
+
+    async def spawn_cached(
+        self,
+        key: Hashable,
+        coro: _CoroLike[_T],
+        *,
+        ttl: float,
+        cache_failures: bool = False,
+        name: Optional[str] = None,
+    ) -> Job[_T]:
+        if self._closed:
+            raise RuntimeError("Scheduling a new job after closing")
+        job: Optional[Job[_T]] = self._cache.get(key)
+        if job is not None:
+            if not callable(coro):
+                coro.close()
+            return job
+        # Cached jobs hand their results out to later callers.
+        job = await self.spawn(coro, name, dedup_key=key, result_policy="keep")
+        if not job.closed:
+            self._cache.watch(job, ttl, cache_failures)
         return job
 
+    def cache_info(self) -> CacheInfo:
+        return self._cache.info()
+
+    def cache_clear(self) -> None:
+        self._cache.clear()
+
     def shield(self, arg: _FutureLike[_T]) -> "asyncio.Future[_T]":
         inner = asyncio.ensure_future(arg)
         if inner.done():
@@ -189,41 +639,150 @@ class Scheduler(Collection[Job[object]]):
     async def wait_and_close(self, timeout: Optional[float] = None) -> None:
         if timeout is None:
             timeout = self._wait_timeout
+        await self._wait_jobs(timeout)
+        await self.close()
+
+    async def drain(
+        self,
+        timeout: Optional[float] = None,
+        *,
+        deadlines: Iterable[Tuple[Hashable, float]] = (),
+        on_progress: Optional[ProgressCallback] = None,
+        interval: float = 1.0,
+    ) -> None:
+        if self._closed:
+            return
+        self._draining = True  # prevent adding new jobs
+        if timeout is None:
+            timeout = self._wait_timeout
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        reporter = None
+        if on_progress is not None:
+            reporter = asyncio.create_task(self._report_progress(on_progress, interval))
+        try:
+            # Jobs with the earliest deadlines are closed first.
+            for tag, deadline in sorted(deadlines, key=lambda item: item[1]):
+                if timeout is not None:
+                    deadline = min(deadline, timeout)
+                await self._wait_jobs(start + deadline - loop.time(), tag)
+                await self.close_tagged(tag)
+            await self._wait_jobs(
+                None if timeout is None else start + timeout - loop.time()
+            )
+            await self.close()
+        finally:
+            if on_progress is not None:
+                assert reporter is not None
+                reporter.cancel()
+                with suppress(asyncio.CancelledError):
+                    await reporter
+                self._call_progress_callback(on_progress)
+
+    async def _wait_jobs(
+        self, timeout: Optional[float], tag: Optional[Hashable] = None
+    ) -> None:
+        # Wait for all jobs and shields, or for jobs tagged with tag.
         with suppress(asyncio.TimeoutError):
             async with asyncio_timeout(timeout):
-                while self._jobs or self._shields:
+                while True:
+                    if tag is None:
+                        jobs: Collection[Job[object]] = self._jobs
+                        shields: Collection[asyncio.Task[object]] = self._shields
+                    else:
+                        jobs = self._tags.get(tag, ())
+                        shields = ()
+                    if not jobs and not shields:
+                        break
                     gather = asyncio.gather(
-                        *(job._wait() for job in self._jobs),
-                        *self._shields,
+                        *(job._wait() for job in jobs),
+                        *shields,
                         return_exceptions=True,
                     )
                     await asyncio.shield(gather)
-        await self.close()
+
+    async def _report_progress(
+        self, on_progress: ProgressCallback, interval: float
+    ) -> None:
+        while True:
+            self._call_progress_callback(on_progress)
+            await asyncio.sleep(interval)
 
     async def close(self) -> None:
         if self._closed:
             return
         self._closed = True  # prevent adding new jobs
+        if self._children:
+            await asyncio.gather(*(child.close() for child in list(self._children)))
+        if self._job_store is not None:
+            # Spilled jobs are kept in the store.
+            self._job_store.flush()
 
         jobs = self._jobs
         if jobs or self._shields:
-            # cleanup pending queue
-            # all job will be started on closing
+            persist = self._persist_on_close
+            running: List[Job[object]] = []
+            if persist == "all":
+                running = [
+                    job
+                    for job in jobs
+                    if job._spec is not None
+                    and job._task is not None
+                    and not job._task.done()
+                ]
+            specs: List[JobSpec] = []
+            # Pending jobs are closed without creating tasks for them.
             while not self._pending.empty():
-                self._pending.get_nowait()
+                job = self._pending.get_nowait()
+                if persist != "never" and job._spec is not None:
+                    specs.append(job._spec)
+                self._forget(job)
+                job._close_pending()
 
+            # Let just started jobs enter their coroutines before cancelling.
+            await asyncio.sleep(0)
+            # Cancel everything in one pass and wait under a shared deadline
+            # instead of a timeout per job.
+            started: List[Job[object]] = []
+            tasks: List[asyncio.Future[object]] = []
+            for job in list(jobs):
+                task = job._task
+                if task is None:
+                    # Admitted to the pending queue during the yield above.
+                    self._close_pending(job)
+                    continue
+                job._closed = True
+                task.cancel()
+                started.append(job)
+                tasks.append(task)
             for f in self._shields:
                 f.cancel()
-
-            await asyncio.gather(
-                *(job._close(self._close_timeout) for job in jobs),
-                *(asyncio.wait_for(f, self._close_timeout) for f in self._shields),
-                return_exceptions=True,
-            )
+                tasks.append(f)
+            if tasks:
+                await asyncio.wait(tasks, timeout=self._close_timeout)
+            for job in started:
+                task = job._task
+                if task is not None and not task.done() and not job._explicit:
+                    job._report_close_timeout(self, asyncio.TimeoutError())
+            if persist != "never":
+                # Cancelled jobs were started ahead of the pending ones.
+                cancelled = [
+                    job._spec
+                    for job in running
+                    if job._spec is not None and job._status == "cancelled"
+                ]
+                self._persist(cancelled + specs)
             self._jobs.clear()
+            self._dedup.clear()
+            self._tags.clear()
+            self._sync()
+        if self._congested:
+            self._check_low_watermark()
         if self._failed_task is not None:
             self._failed_tasks.put_nowait(None)
             await self._failed_task
+        if self._parent is not None:
+            self._detach()
 
     def call_exception_handler(self, context: Dict[str, Any]) -> None:
         if self._exception_handler is None:
@@ -235,22 +794,295 @@ class Scheduler(Collection[Job[object]]):
     def exception_handler(self) -> Optional[ExceptionHandler]:
         return self._exception_handler
 
-    def _done(self, job: Job[object]) -> None:
-        self._jobs.discard(job)
-        if not self.pending_count:
+    def _check_spawn(self) -> None:
+        if self._closed:
+            raise RuntimeError("Scheduling a new job after closing")
+        if self._draining:
+            raise RuntimeError("Scheduling a new job while draining")
+        if self._failed_task is None:
+            self._failed_task = asyncio.create_task(self._wait_failed())
+        else:
+            if self._failed_task.get_loop() is not asyncio.get_running_loop():
+                raise RuntimeError(f"{self!r} is bound to a different event loop")
+
+    def _has_capacity(self) -> bool:
+        if self._parent is None and not self._children:
+            return self._limit is None or self.active_count < self._limit
+        free = self._free_slots()
+        return free is None or free > 0
+
+    def _free_slots(self) -> Optional[int]:
+        # A slot should be free on every level up to the root, limits of
+        # parents cover jobs of their children.
+        free: Optional[int] = None
+        node: Optional[Scheduler] = self
+        while node is not None:
+            if node._limit is not None:
+                room = node._limit - node.total_active_count
+                free = room if free is None else min(free, room)
+            node = node._parent
+        return free
+
+    def _sync(self) -> None:
+        # Report changes of the active count and of waiting jobs to the
+        # ancestors, checks of free slots don't walk the tree then.
+        parent = self._parent
+        if parent is None or self not in parent._children:
             return
-        # No pending jobs when limit is None
-        # Safe to subtract.
-        ntodo = self._limit - self.active_count  # type: ignore[operator]
-        i = 0
-        while i < ntodo:
-            if not self.pending_count:
-                return
-            new_job = self._pending.get_nowait()
-            if new_job.closed:
-                continue
-            new_job._start()
-            i += 1
+        delta = self.active_count - self._active
+        if delta:
+            self._active += delta
+            self._add_active(delta)
+        waiting = bool(
+            self._pending.qsize() or self._retry_waiters or self._waiting_children
+        )
+        if waiting != (self in parent._waiting_children):
+            if waiting:
+                parent._waiting_children[self] = None
+            else:
+                del parent._waiting_children[self]
+            parent._sync()
+
+    def _add_active(self, delta: int) -> None:
+        child = self
+        node = self._parent
+        while node is not None and child in node._children:
+            node._children_active += delta
+            child = node
+            node = node._parent
+
+    def _detach(self) -> None:
+        parent = self._parent
+        assert parent is not None
+        if self in parent._children:
+            self._add_active(-(self._active + self._children_active))
+            del parent._children[self]
+            parent._waiting_children.pop(self, None)
+            parent._sync()
+
+    def _release(self) -> None:
+        # A freed slot may be taken by a job anywhere in the tree.
+        root = self
+        while root._parent is not None:
+            root = root._parent
+        root._promote()
+
+    def _spawn_nowait(self, spec: JobSpec) -> None:
+        # The caller makes sure there is a room in the pending queue.
+        fn, args, kwargs = spec
+        coro = fn(*args, **kwargs)
+        job = Job(coro, self, result_policy=self._result_policy)
+        job._spec = spec
+        if self._metrics is not None:
+            self._metrics._job_spawned(job)
+        if self._has_capacity():
+            job._start()
+        else:
+            self._pending.put_nowait(job)
+        self._jobs.add(job)
+        self._sync()
+        if self._high_watermark is not None:
+            self._check_high_watermark()
+
+    def _refill(self) -> None:
+        # Page spilled jobs back in once the pending queue has dropped to
+        # a half of spill_threshold, or a slot is free.
+        store = self._job_store
+        assert store is not None
+        if not len(store) or self._closed or self._draining:
+            # Spilled jobs are left in the store on draining.
+            return
+        pending = self.pending_count
+        if pending > self._spill_threshold // 2 and not self._has_capacity():
+            return
+        room = self._spill_threshold - pending
+        if self._pending.maxsize:
+            room = min(room, self._pending.maxsize - pending)
+        free = self._free_slots()
+        if free is not None:
+            room += max(free, 0)
+        if room <= 0:
+            # A full pending queue, popping nothing would still commit.
+            return
+        for data in store.pop(room):
+            try:
+                self._spawn_nowait(load_spec(data))
+            except Exception as exc:
+                self.call_exception_handler(
+                    {"message": "Restoring a deferred job failed", "exception": exc}
+                )
+
+    def _persist(self, specs: List[JobSpec]) -> None:
+        store = self._job_store
+        assert store is not None
+        dumped = []
+        for spec in specs:
+            try:
+                dumped.append(dump_spec(spec))
+            except Exception as exc:
+                self.call_exception_handler(
+                    {"message": "Persisting a deferred job failed", "exception": exc}
+                )
+        # Persisted jobs were deferred before the spilled ones.
+        store.push_front(dumped)
+
+    def _check_high_watermark(self) -> None:
+        assert self._high_watermark is not None
+        if not self._congested and len(self._jobs) >= self._high_watermark:
+            self._congested = True
+            self._capacity.clear()
+            for on_high, _ in list(self._watermark_callbacks):
+                self._call_watermark_callback(on_high)
+
+    def _check_low_watermark(self) -> None:
+        assert self._low_watermark is not None
+        if self._congested and len(self._jobs) <= self._low_watermark:
+            self._congested = False
+            self._capacity.set()
+            for _, on_low in list(self._watermark_callbacks):
+                self._call_watermark_callback(on_low)
+
+    def _call_watermark_callback(self, callback: WatermarkCallback) -> None:
+        try:
+            callback()
+        except Exception as exc:
+            self.call_exception_handler(
+                {
+                    "message": "Watermark callback failed",
+                    "exception": exc,
+                    "callback": callback,
+                }
+            )
+
+    def _call_progress_callback(self, on_progress: ProgressCallback) -> None:
+        try:
+            on_progress(self.active_count, self.pending_count)
+        except Exception as exc:
+            self.call_exception_handler(
+                {
+                    "message": "Progress callback failed",
+                    "exception": exc,
+                    "callback": on_progress,
+                }
+            )
+
+    def _forget(self, job: Job[object]) -> None:
+        self._jobs.discard(job)
+        self._sync()
+        if self._metrics is not None:
+            self._metrics._job_done(job)
+        key = job._dedup_key
+        if key is not None:
+            if self._dedup.get(key) is job:
+                del self._dedup[key]
+            self._cache.job_done(job)
+        for tag in job._tags:
+            tagged = self._tags.get(tag)
+            if tagged is not None:
+                tagged.discard(job)
+                if not tagged:
+                    del self._tags[tag]
+        if job._breaker is not None:
+            assert self._circuit_breaker is not None
+            task = job._task
+            if task is None or task.cancelled():
+                failed = None
+            else:
+                failed = task.exception() is not None
+            self._circuit_breaker._record(*job._breaker, failed)
+
+    def _shed(self, job: Job[object]) -> None:
+        self._shed_count += 1
+        self._forget(job)
+        job._close_pending()
+
+    def _create_task(
+        self,
+        coro: Coroutine[object, object, _T],
+        name: Optional[str],
+        context: Optional[contextvars.Context],
+    ) -> "asyncio.Task[_T]":
+        loop = asyncio.get_running_loop()
+        factory = self._task_factory
+        if context is None:
+            if factory is None:
+                return loop.create_task(coro, name=name)
+            return factory(loop, coro, name=name)
+        if sys.version_info >= (3, 11):
+            if factory is None:
+                return loop.create_task(coro, name=name, context=context)
+            return factory(loop, coro, name=name, context=context)
+        else:
+            # Tasks copy the current context on older Pythons, the job runs
+            # in a copy of the given one.
+            if factory is None:
+                return context.run(loop.create_task, coro, name=name)
+            return context.run(factory, loop, coro, name=name)
+
+    def _close_pending(self, job: Job[object]) -> None:
+        # A pending job closed by Job.close() or a cancelled spawn() frees
+        # its pending slot immediately.
+        self._pending.remove(job)
+        self._forget(job)
+        job._close_pending()
+        if self._congested:
+            self._check_low_watermark()
+        if self._job_store is not None:
+            self._refill()
+
+    def _done(self, job: Job[object]) -> None:
+        self._forget(job)
+        if self._congested:
+            self._check_low_watermark()
+        self._release()
+        if self._job_store is not None:
+            self._refill()
+
+    def _promote(self) -> None:
+        if self._retry_waiters or self.pending_count:
+            free = self._free_slots()
+            # No limit on the way to the root, every job has a slot.
+            ntodo = (
+                len(self._retry_waiters) + self.pending_count if free is None else free
+            )
+            # Retried jobs have been admitted already, they go first.
+            while ntodo > 0 and self._retry_waiters:
+                waiter = self._retry_waiters.popleft()
+                if waiter.done():
+                    continue
+                waiter.set_result(None)
+                self._backoff_count -= 1
+                ntodo -= 1
+            while ntodo > 0 and self.pending_count:
+                self._pending.get_nowait()._start()
+                ntodo -= 1
+            self._sync()
+        if self._waiting_children:
+            # Children with waiting jobs take the remaining slots in turns.
+            children = list(self._waiting_children)
+            self._waiting_children.move_to_end(children[0])
+            for child in children:
+                child._promote()
+
+    async def _backoff(self, delay: float) -> None:
+        # Wait before retrying a job without holding a concurrency slot.
+        self._retry_count += 1
+        self._backoff_count += 1
+        self._sync()
+        self._release()
+        waiter: Optional[asyncio.Future[None]] = None
+        try:
+            await asyncio.sleep(delay)
+            if not self._has_capacity():
+                waiter = asyncio.get_running_loop().create_future()
+                self._retry_waiters.append(waiter)
+                self._sync()
+                await waiter
+        finally:
+            # _promote() takes the job out of backoff when it wakes the waiter up
+            if waiter is None or waiter.cancelled():
+                self._backoff_count -= 1
+                self._sync()
 
     async def _wait_failed(self) -> None:
         # a coroutine for waiting failed tasks
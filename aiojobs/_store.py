@@ -0,0 +1,96 @@
+import os
+import pickle
+import sqlite3
+from collections.abc import Coroutine, Iterable, Sequence
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+JobSpec = Tuple[
+    Callable[..., Coroutine[object, object, object]], Tuple[Any, ...], Dict[str, Any]
+]
+
+_COMMIT_EVERY = 1000
+
+
+def dump_spec(spec: JobSpec) -> bytes:
+    return pickle.dumps(spec, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_spec(data: bytes) -> JobSpec:
+    fn, args, kwargs = pickle.loads(data)
+    return fn, args, kwargs
+
+
+class JobStore:
+    """FIFO of serialized job specs kept in a local SQLite database.
+
+    Specs are pickled, the file should not be shared with untrusted parties.
+    """
+
+    __slots__ = ("_path", "_conn", "_count", "_uncommitted")
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"]):
+        self._path = os.fspath(path)
+        self._conn = sqlite3.connect(self._path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs "
+            "(id INTEGER PRIMARY KEY AUTOINCREMENT, spec BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        row = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()
+        self._count: int = row[0]
+        self._uncommitted = 0
+
+    def __repr__(self) -> str:
+        return f"<JobStore path={self._path!r} jobs={self._count}>"
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def push(self, specs: Iterable[bytes]) -> None:
+        rows = [(spec,) for spec in specs]
+        self._conn.executemany("INSERT INTO jobs (spec) VALUES (?)", rows)
+        self._count += len(rows)
+        self._uncommitted += len(rows)
+        if self._uncommitted >= _COMMIT_EVERY:
+            self.flush()
+
+    def push_front(self, specs: Sequence[bytes]) -> None:
+        if not specs:
+            return
+        row = self._conn.execute("SELECT MIN(id) FROM jobs").fetchone()
+        if row[0] is None:
+            self.push(specs)
+        else:
+            # Explicit ids below the current head keep the FIFO order.
+            first = row[0] - len(specs)
+            self._conn.executemany(
+                "INSERT INTO jobs (id, spec) VALUES (?, ?)",
+                ((first + i, spec) for i, spec in enumerate(specs)),
+            )
+            self._count += len(specs)
+        # Specs persisted on close are committed right away.
+        self.flush()
+
+    def pop(self, n: int) -> List[bytes]:
+        rows = self._conn.execute(
+            "SELECT id, spec FROM jobs ORDER BY id LIMIT ?", (n,)
+        ).fetchall()
+        if rows:
+            self._conn.execute("DELETE FROM jobs WHERE id <= ?", (rows[-1][0],))
+            self._count -= len(rows)
+            self.flush()
+        return [spec for _, spec in rows]
+
+    def flush(self) -> None:
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
@@ -1,20 +1,47 @@
 import asyncio
-from collections.abc import AsyncIterator, Awaitable, Coroutine
+import math
+from collections.abc import (
+    AsyncIterator,
+    Awaitable,
+    Coroutine,
+    Hashable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+)
 from functools import wraps
 from typing import (
     Any,
     Callable,
+    FrozenSet,
+    NamedTuple,
     Optional,
+    Tuple,
     TypeVar,
     Union,
 )
 
 from aiohttp import web
+from aiohttp.typedefs import Handler, Middleware
 
 from ._job import Job
-from ._scheduler import Scheduler
+from ._metrics import render_prometheus
+from ._scheduler import ProgressCallback, Scheduler, _CoroLike
 
-__all__ = ("setup", "spawn", "get_scheduler", "get_scheduler_from_app", "atomic")
+__all__ = (
+    "Admission",
+    "Drain",
+    "RequestScheduler",
+    "setup",
+    "spawn",
+    "get_scheduler",
+    "get_scheduler_from_app",
+    "request_scheduler",
+    "atomic",
+    "admission_middleware",
+    "metrics_handler",
+)
 
 _T = TypeVar("_T")
 _FutureLike = Union["asyncio.Future[_T]", Awaitable[_T]]
@@ -22,6 +49,98 @@ _RequestView = TypeVar("_RequestView", bound=Union[web.Request, web.View])
 
 
 AIOJOBS_SCHEDULER = web.AppKey("AIOJOBS_SCHEDULER", Scheduler)
+_REQUEST_SCOPES = web.AppKey("_REQUEST_SCOPES", bool)
+
+
+class Drain(NamedTuple):
+    """Parameters of Scheduler.drain() called on application cleanup."""
+
+    timeout: Optional[float] = None
+    deadlines: Sequence[Tuple[Hashable, float]] = ()
+    on_progress: Optional[ProgressCallback] = None
+    interval: float = 1.0
+
+
+class Admission(NamedTuple):
+    """Thresholds above which admission_middleware() rejects requests."""
+
+    max_pending: Optional[int] = None
+    max_wait: Optional[float] = None
+    retry_after: float = 1.0
+
+
+class RequestScheduler:
+    """Jobs of a request closed in bulk when its handler returns.
+
+    The jobs are spawned by the application scheduler and count against
+    its limit, the scope is used as their tag.
+    """
+
+    __slots__ = ("_scheduler", "_limit", "_closed")
+
+    def __init__(self, scheduler: Scheduler, limit: Optional[int] = None) -> None:
+        if limit is not None and limit <= 0:
+            raise ValueError(f"limit should be positive, got {limit}")
+        self._scheduler = scheduler
+        self._limit = limit
+        self._closed = False
+
+    def __repr__(self) -> str:
+        state = "closed " if self._closed else ""
+        return f"<RequestScheduler {state}jobs={len(self)}>"
+
+    def __len__(self) -> int:
+        return self._scheduler.count_by_tag(self)
+
+    def __iter__(self) -> Iterator[Job[Any]]:
+        return iter(self.jobs)
+
+    @property
+    def scheduler(self) -> Scheduler:
+        return self._scheduler
+
+    @property
+    def limit(self) -> Optional[int]:
+        return self._limit
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def jobs(self) -> FrozenSet[Job[Any]]:
+        return self._scheduler.jobs_by_tag(self)
+
+    async def spawn(
+        self,
+        coro: _CoroLike[_T],
+        name: Optional[str] = None,
+        *,
+        tags: Iterable[Hashable] = (),
+        **kwargs: Any,
+    ) -> Job[_T]:
+        if self._closed:
+            reason = "Scheduling a new job after closing"
+        elif self._limit is not None and len(self) >= self._limit:
+            reason = "Job limit of the request is reached"
+        else:
+            return await self._scheduler.spawn(coro, name, tags=(self, *tags), **kwargs)
+        if not callable(coro):
+            coro.close()
+        if self._closed:
+            raise RuntimeError(reason)
+        raise asyncio.QueueFull(reason)
+
+    async def close(self) -> None:
+        self._closed = True
+        await self._scheduler.close_tagged(self)
+
+
+_REQUEST_SCHEDULER: Any
+if hasattr(web, "RequestKey"):
+    _REQUEST_SCHEDULER = web.RequestKey("_REQUEST_SCHEDULER", RequestScheduler)
+else:  # Older aiohttp has no typed request keys.
+    _REQUEST_SCHEDULER = "aiojobs_request_scheduler"
 
 
 def get_scheduler(request: web.Request) -> Scheduler:
@@ -31,6 +150,36 @@ def get_scheduler(request: web.Request) -> Scheduler:
     return scheduler
 
 
+def request_scheduler(
+    request: web.Request, *, limit: Optional[int] = None
+) -> RequestScheduler:
+    if not request.config_dict.get(_REQUEST_SCOPES, False):
+        raise RuntimeError(
+            "Call aiojobs.aiohttp.setup() with request_scopes=True "
+            "to use request schedulers"
+        )
+    scope: Optional[RequestScheduler] = request.get(_REQUEST_SCHEDULER)
+    if scope is None:
+        scope = request[_REQUEST_SCHEDULER] = RequestScheduler(
+            get_scheduler(request), limit
+        )
+    return scope
+
+
+@web.middleware
+async def _close_request_scheduler(
+    request: web.Request, handler: Handler
+) -> web.StreamResponse:
+    try:
+        return await handler(request)
+    finally:
+        scope: Optional[RequestScheduler] = request.get(_REQUEST_SCHEDULER)
+        if scope is not None and not scope.closed:
+            # Neither delay the response nor let a cancelled handler
+            # interrupt the closing, the scheduler waits for it on shutdown.
+            scope.scheduler.shield(scope.close())  # type: ignore[unused-awaitable]
+
+
 def get_scheduler_from_app(app: web.Application) -> Optional[Scheduler]:
     return app.get(AIOJOBS_SCHEDULER)
 
@@ -59,15 +208,81 @@ def atomic(
             request = request_or_view
 
         job = await spawn(request, coro(request_or_view))
-        return await job.wait()
+        return await job._join()
 
     return wrapper
 
 
-def setup(app: web.Application, **kwargs: Any) -> None:
+def _estimated_wait(scheduler: Scheduler) -> float:
+    metrics = scheduler.metrics
+    limit = scheduler.limit
+    if metrics is None or limit is None or not metrics.run_time.count:
+        return 0.0
+    mean = metrics.run_time.sum / metrics.run_time.count
+    return scheduler.pending_count * mean / limit
+
+
+def admission_middleware(
+    default: Optional[Admission] = Admission(),
+    *,
+    routes: Optional[Mapping[str, Optional[Admission]]] = None,
+) -> Middleware:
+    by_name = dict(routes or {})
+
+    @web.middleware
+    async def middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+        name = request.match_info.route.name
+        admission = by_name.get(name, default) if name else default
+        if admission is not None:
+            scheduler = get_scheduler(request)
+            if (
+                admission.max_pending is not None
+                and scheduler.pending_count >= admission.max_pending
+            ) or (
+                admission.max_wait is not None
+                and _estimated_wait(scheduler) >= admission.max_wait
+            ):
+                retry_after = math.ceil(admission.retry_after)
+                raise web.HTTPServiceUnavailable(
+                    headers={"Retry-After": str(retry_after)}
+                )
+        return await handler(request)
+
+    return middleware
+
+
+def metrics_handler(
+    *, prefix: str = "aiojobs"
+) -> Callable[[web.Request], Awaitable[web.Response]]:
+    async def handler(request: web.Request) -> web.Response:
+        text = render_prometheus(get_scheduler(request), prefix)
+        return web.Response(text=text, content_type="text/plain; version=0.0.4")
+
+    return handler
+
+
+def setup(
+    app: web.Application,
+    *,
+    drain: Optional[Drain] = None,
+    request_scopes: bool = False,
+    **kwargs: Any,
+) -> None:
     async def cleanup_context(app: web.Application) -> AsyncIterator[None]:
         app[AIOJOBS_SCHEDULER] = scheduler = Scheduler(**kwargs)
         yield
-        await scheduler.wait_and_close()
+        if drain is None:
+            await scheduler.wait_and_close()
+        else:
+            await scheduler.drain(
+                drain.timeout,
+                deadlines=drain.deadlines,
+                on_progress=drain.on_progress,
+                interval=drain.interval,
+            )
 
     app.cleanup_ctx.append(cleanup_context)
+    if request_scopes:
+        # Only applications using request_scheduler() pay for the middleware.
+        app[_REQUEST_SCOPES] = True
+        app.middlewares.append(_close_request_scheduler)
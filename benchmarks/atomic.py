@@ -0,0 +1,66 @@
+"""Requests per second of aiohttp handlers with and without @atomic.
+
+Runs a local aiohttp test server and a client in the same process, then
+measures the overhead of calling the handlers directly.
+
+Usage: python benchmarks/atomic.py [REQUESTS] [CONCURRENCY]
+"""
+
+import asyncio
+import sys
+import time
+
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer, make_mocked_request
+
+from aiojobs import Scheduler
+from aiojobs.aiohttp import AIOJOBS_SCHEDULER, atomic, setup
+
+
+async def plain(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+@atomic
+async def wrapped(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+async def bench(client: ClientSession, url: str, n: int, concurrency: int) -> float:
+    async def worker(count: int) -> None:
+        for _ in range(count):
+            async with client.get(url) as resp:
+                await resp.read()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(n // concurrency) for _ in range(concurrency)))
+    return n / (time.perf_counter() - start)
+
+
+async def main(n: int, concurrency: int) -> None:
+    app = web.Application()
+    app.router.add_get("/plain", plain)
+    app.router.add_get("/atomic", wrapped)
+    setup(app, limit=None)
+
+    async with TestServer(app) as server:
+        async with ClientSession() as client:
+            for path in ("/plain", "/atomic") * 2:
+                rps = await bench(client, str(server.make_url(path)), n, concurrency)
+                print(f"{path:<8} {rps:9.0f} req/s")
+
+    app = web.Application()
+    app[AIOJOBS_SCHEDULER] = scheduler = Scheduler(limit=None)
+    request = make_mocked_request("GET", "/", app=app)
+    for name, handler in (("plain", plain), ("atomic", wrapped)) * 2:
+        start = time.perf_counter()
+        for _ in range(n):
+            await handler(request)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<8} {elapsed / n * 1e6:9.2f} us/call")
+    await scheduler.close()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    asyncio.run(main(*(args + [20_000, 50][len(args) :])))
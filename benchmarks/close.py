@@ -0,0 +1,35 @@
+"""Time and peak memory of Scheduler.close() with many running jobs.
+
+Usage: python benchmarks/close.py [JOBS ...]
+"""
+
+import asyncio
+import sys
+import time
+import tracemalloc
+
+import aiojobs
+
+
+async def job() -> None:
+    await asyncio.sleep(3600)
+
+
+async def main(n: int) -> None:
+    scheduler = aiojobs.Scheduler(limit=None, pending_limit=0)
+    for _ in range(n):
+        await scheduler.spawn(job())
+    await asyncio.sleep(0)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    await scheduler.close()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{n:>9} jobs: {elapsed:8.3f} s, peak {peak / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    for arg in sys.argv[1:] or ("10000", "100000", "1000000"):
+        asyncio.run(main(int(arg)))
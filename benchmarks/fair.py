@@ -0,0 +1,54 @@
+"""Queue wait of a small tenant while a large tenant floods the scheduler.
+
+Usage: python benchmarks/fair.py [FLOOD_JOBS]
+"""
+
+import asyncio
+import statistics
+import sys
+from typing import List
+
+import aiojobs
+
+LIMIT = 10
+RUN_TIME = 0.001
+SMALL_JOBS = 100
+
+
+async def job() -> None:
+    await asyncio.sleep(RUN_TIME)
+
+
+async def main(flood: int, fair: bool) -> None:
+    scheduler = aiojobs.Scheduler(limit=LIMIT, pending_limit=0, fair_queue=fair)
+    tenant = {"tenant": "big"} if fair else {}
+    for _ in range(flood):
+        await scheduler.spawn(job(), **tenant)
+
+    loop = asyncio.get_running_loop()
+    waits: List[float] = []
+
+    async def small(spawned: float) -> None:
+        waits.append(loop.time() - spawned)
+        await job()
+
+    tenant = {"tenant": "small"} if fair else {}
+    for _ in range(SMALL_JOBS):
+        await scheduler.spawn(small(loop.time()), **tenant)
+        await asyncio.sleep(RUN_TIME * 5)
+    await scheduler.wait_and_close()
+
+    waits.sort()
+    p50 = statistics.median(waits)
+    p99 = waits[int(len(waits) * 0.99) - 1]
+    mode = "fair" if fair else "fifo"
+    print(
+        f"{mode}: {flood:>6} flood jobs, small tenant wait "
+        f"p50 {p50 * 1000:8.1f} ms, p99 {p99 * 1000:8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    flood = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for fair in (False, True):
+        asyncio.run(main(flood, fair))
@@ -0,0 +1,86 @@
+"""Allocations of Scheduler.spawn() and Scheduler.defer().
+
+Reports memory blocks and bytes held per running job (traced by
+tracemalloc) and the garbage collector pressure of short jobs.
+
+Usage: python benchmarks/spawn.py [JOBS]
+"""
+
+import asyncio
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import aiojobs
+
+
+async def short() -> None:
+    pass
+
+
+async def blocked(fut: "asyncio.Future[None]") -> None:
+    await fut
+
+
+async def footprint(n: int) -> None:
+    scheduler = aiojobs.Scheduler(limit=None, pending_limit=0)
+    fut = asyncio.get_running_loop().create_future()
+    await scheduler.spawn(blocked(fut))
+    await asyncio.sleep(0)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(n):
+        await scheduler.spawn(blocked(fut))
+    await asyncio.sleep(0)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    print(f"running job footprint:  {blocks / n:6.2f} blocks, {size / n:7.1f} B")
+    fut.set_result(None)
+    await scheduler.close()
+
+
+async def churn(name: str, n: int, scheduler: aiojobs.Scheduler, defer: bool) -> None:
+    async def run() -> None:
+        for i in range(n):
+            if defer:
+                scheduler.defer(short)
+            else:
+                await scheduler.spawn(short())
+            if i % 100 == 0:
+                await asyncio.sleep(0)
+        while len(scheduler):
+            await asyncio.sleep(0)
+
+    await run()  # warm up
+    collections = gc.get_stats()[0]["collections"]
+    start = time.perf_counter()
+    await run()
+    elapsed = time.perf_counter() - start
+    collections = gc.get_stats()[0]["collections"] - collections
+    print(
+        f"{name:<22} {n / elapsed:9.0f} jobs/s, "
+        f"{collections * 1000 / n:5.2f} gen0 collections per 1k jobs"
+    )
+    await scheduler.close()
+
+
+async def main(n: int) -> None:
+    await footprint(n)
+    await churn("spawn()", n, aiojobs.Scheduler(limit=100, pending_limit=0), False)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = aiojobs.JobStore(Path(tmp) / "jobs.sqlite")
+        scheduler = aiojobs.Scheduler(limit=100, pending_limit=0, job_store=store)
+        await churn("defer()", n, scheduler, True)
+        store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
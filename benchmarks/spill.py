@@ -0,0 +1,46 @@
+"""Throughput of Scheduler.defer() spilling to and refilling from a JobStore.
+
+Usage: python benchmarks/spill.py [JOBS]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiojobs
+
+done = 0
+
+
+async def job(i: int) -> None:
+    global done
+    done += 1
+
+
+async def main(n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = aiojobs.JobStore(Path(tmp) / "jobs.sqlite")
+        scheduler = aiojobs.Scheduler(
+            limit=100, pending_limit=0, job_store=store, spill_threshold=1000
+        )
+
+        start = time.perf_counter()
+        for i in range(n):
+            scheduler.defer(job, i)
+        spill = time.perf_counter() - start
+        print(f"spill:  {n / spill:12.0f} jobs/s ({scheduler.spilled_count} on disk)")
+
+        start = time.perf_counter()
+        while done < n:
+            await asyncio.sleep(0)
+        refill = time.perf_counter() - start
+        print(f"refill: {n / refill:12.0f} jobs/s")
+
+        await scheduler.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -1,6 +1,6 @@
 import asyncio
 from collections.abc import Awaitable
-from typing import Callable
+from typing import Callable, List, Tuple
 
 import pytest
 from aiohttp import ClientSession, web
@@ -8,10 +8,14 @@ from aiohttp import ClientSession, web
 # isort: off
 
 from aiojobs.aiohttp import (
+    Admission,
+    Drain,
+    admission_middleware,
     atomic,
     get_scheduler,
     get_scheduler_from_app,
     get_scheduler_from_request,
+    request_scheduler,
     setup as aiojobs_setup,
     shield,
     spawn,
@@ -91,6 +95,21 @@ async def test_atomic(aiohttp_client: _Client) -> None:
     assert scheduler.pending_count == 0
 
 
+async def test_atomic_released_result(aiohttp_client: _Client) -> None:
+    @atomic
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    aiojobs_setup(app, limit=1, result_policy="drop")
+
+    client = await aiohttp_client(app)
+    # Queued handlers receive their responses too.
+    responses = await asyncio.gather(*(client.get("/") for _ in range(3)))
+    assert [resp.status for resp in responses] == [200, 200, 200]
+
+
 async def test_atomic_from_view(aiohttp_client: _Client) -> None:
     app = web.Application()
 
@@ -175,3 +194,175 @@ async def test_nested_application_not_set(aiohttp_client: _Client) -> None:
     client = await aiohttp_client(app)
     resp = await client.get("/sub/")
     assert resp.status == 200
+
+
+async def test_setup_drain(aiohttp_client: _Client) -> None:
+    progress: List[Tuple[int, int]] = []
+    job = None
+
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    async def handler(request: web.Request) -> web.Response:
+        nonlocal job
+        job = await spawn(request, coro())
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    drain = Drain(0.05, on_progress=lambda *args: progress.append(args))
+    aiojobs_setup(app, drain=drain)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+    scheduler = get_scheduler_from_app(app)
+    assert scheduler is not None
+
+    await client.close()
+    assert job is not None
+    assert job.closed
+    assert scheduler.closed
+    assert progress[0] == (1, 0)
+    assert progress[-1] == (0, 0)
+
+
+async def test_admission_middleware(aiohttp_client: _Client) -> None:
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    async def handler(request: web.Request) -> web.Response:
+        await spawn(request, coro())
+        return web.Response()
+
+    middleware = admission_middleware(
+        Admission(max_pending=1, retry_after=2.5), routes={"health": None}
+    )
+    app = web.Application(middlewares=[middleware])
+    app.router.add_get("/", handler)
+    app.router.add_get("/health", handler, name="health")
+    aiojobs_setup(app, limit=1, drain=Drain(0))
+
+    client = await aiohttp_client(app)
+    assert (await client.get("/")).status == 200
+    assert (await client.get("/")).status == 200
+    resp = await client.get("/")
+    assert resp.status == 503
+    assert resp.headers["Retry-After"] == "3"
+    # Admission is disabled for the route.
+    assert (await client.get("/health")).status == 200
+    await client.close()
+
+
+async def test_admission_middleware_max_wait(aiohttp_client: _Client) -> None:
+    async def handler(request: web.Request) -> web.Response:
+        await spawn(request, asyncio.sleep(float(request.query["delay"])))
+        return web.Response()
+
+    app = web.Application(middlewares=[admission_middleware(Admission(max_wait=1))])
+    app.router.add_get("/", handler)
+    aiojobs_setup(app, limit=1, metrics=True, drain=Drain(0))
+
+    client = await aiohttp_client(app)
+    # Nothing is known about the run time yet.
+    assert (await client.get("/?delay=0.01")).status == 200
+    await asyncio.sleep(0.02)
+    assert (await client.get("/?delay=10")).status == 200
+    for _ in range(100):
+        resp = await client.get("/?delay=0")
+        if resp.status == 503:
+            break
+    # About 100 pending jobs of 10ms each are estimated to be waiting for a second.
+    assert resp.status == 503
+    assert resp.headers["Retry-After"] == "1"
+    await client.close()
+
+
+async def test_request_scheduler(aiohttp_client: _Client) -> None:
+    jobs = []
+
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    async def handler(request: web.Request) -> web.Response:
+        scope = request_scheduler(request, limit=2)
+        assert request_scheduler(request) is scope
+        assert scope.scheduler is get_scheduler(request)
+        assert scope.limit == 2
+        jobs.append(await scope.spawn(coro()))
+        jobs.append(await scope.spawn(coro, tags=("tag",)))
+        assert len(scope) == 2
+        assert scope.jobs == set(jobs)
+        with pytest.raises(asyncio.QueueFull):
+            await scope.spawn(coro())
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    aiojobs_setup(app, request_scopes=True)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+    assert len(jobs) == 2
+    scheduler = get_scheduler_from_app(app)
+    assert scheduler is not None
+    for _ in range(100):
+        if not len(scheduler):
+            break
+        await asyncio.sleep(0.01)
+    assert len(scheduler) == 0
+    assert all(job.closed for job in jobs)
+    await client.close()
+
+
+async def test_request_scheduler_websocket(aiohttp_client: _Client) -> None:
+    job = None
+
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    async def handler(request: web.Request) -> web.WebSocketResponse:
+        nonlocal job
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        scope = request_scheduler(request)
+        async for _ in ws:
+            job = await scope.spawn(coro())
+            await ws.send_str("spawned")
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    aiojobs_setup(app, request_scopes=True)
+
+    client = await aiohttp_client(app)
+    async with client.ws_connect("/") as ws:
+        await ws.send_str("spawn")
+        assert await ws.receive_str() == "spawned"
+        assert job is not None
+        assert job.active
+    for _ in range(100):
+        if job.closed:
+            break
+        await asyncio.sleep(0.01)
+    assert job.closed
+    await client.close()
+
+
+async def test_request_scheduler_not_enabled(aiohttp_client: _Client) -> None:
+    async def handler(request: web.Request) -> web.Response:
+        with pytest.raises(RuntimeError, match="request_scopes=True"):
+            request_scheduler(request)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    aiojobs_setup(app)
+    # The middleware is added on demand only.
+    assert not app.middlewares
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+    await client.close()
@@ -0,0 +1,175 @@
+import asyncio
+from collections.abc import Awaitable
+from typing import Callable, List, NoReturn
+
+import pytest
+
+from aiojobs import Batcher, Scheduler
+
+_MakeScheduler = Callable[..., Awaitable[Scheduler]]
+
+
+async def test_batcher_max_size(scheduler: Scheduler) -> None:
+    batches: List[List[int]] = []
+
+    async def batch_fn(items: List[int]) -> List[int]:
+        batches.append(items)
+        return [i * 2 for i in items]
+
+    batcher = Batcher(scheduler, batch_fn, max_size=3, max_delay=10)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(6)))
+    assert list(results) == [0, 2, 4, 6, 8, 10]
+    assert batches == [[0, 1, 2], [3, 4, 5]]
+    await batcher.close()
+
+
+async def test_batcher_max_delay(scheduler: Scheduler) -> None:
+    batches: List[List[int]] = []
+
+    async def batch_fn(items: List[int]) -> List[int]:
+        batches.append(items)
+        return items
+
+    batcher = Batcher(scheduler, batch_fn, max_size=10, max_delay=0.01)
+    results = await asyncio.gather(batcher.submit(1), batcher.submit(2))
+    assert list(results) == [1, 2]
+    assert batches == [[1, 2]]
+    await batcher.close()
+
+
+async def test_batcher_exception(scheduler: Scheduler) -> None:
+    exc = RuntimeError()
+
+    async def batch_fn(items: List[int]) -> NoReturn:
+        raise exc
+
+    batcher: Batcher[int, int] = Batcher(scheduler, batch_fn, max_size=2)
+    results = await asyncio.gather(
+        batcher.submit(1), batcher.submit(2), return_exceptions=True
+    )
+    assert list(results) == [exc, exc]
+    await batcher.close()
+
+
+async def test_batcher_results_mismatch(scheduler: Scheduler) -> None:
+    async def batch_fn(items: List[int]) -> List[int]:
+        return []
+
+    batcher = Batcher(scheduler, batch_fn, max_size=1)
+    with pytest.raises(ValueError, match="returned 0 results for 1 items"):
+        await batcher.submit(1)
+    await batcher.close()
+
+
+async def test_batcher_limit(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def batch_fn(items: List[int]) -> List[int]:
+        await fut
+        return items
+
+    batcher = Batcher(scheduler, batch_fn, max_size=1)
+    t1 = asyncio.create_task(batcher.submit(1))
+    t2 = asyncio.create_task(batcher.submit(2))
+    await asyncio.sleep(0.01)
+    assert scheduler.active_count == 1
+    assert scheduler.pending_count == 1
+
+    fut.set_result(None)
+    assert await t1 == 1
+    assert await t2 == 2
+    await batcher.close()
+
+
+async def test_batcher_flush_cancelled(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1, pending_limit=1)
+    fut: asyncio.Future[None] = asyncio.Future()
+    batches: List[List[int]] = []
+
+    async def batch_fn(items: List[int]) -> List[int]:
+        batches.append(items)
+        await fut
+        return items
+
+    batcher = Batcher(scheduler, batch_fn, max_size=2, max_delay=0.01)
+    first = asyncio.gather(batcher.submit(1), batcher.submit(2))
+    second = asyncio.gather(batcher.submit(3), batcher.submit(4))
+    await asyncio.sleep(0.01)
+    # The third batch waits for a free slot in the pending queue.
+    t5 = asyncio.create_task(batcher.submit(5))
+    t6 = asyncio.create_task(batcher.submit(6))
+    await asyncio.sleep(0)
+    assert scheduler.active_count == 1
+    assert scheduler.pending_count == 1
+
+    t6.cancel()
+    await asyncio.sleep(0)
+    assert t6.cancelled()
+    assert not t5.done()
+
+    fut.set_result(None)
+    assert list(await first) == [1, 2]
+    assert list(await second) == [3, 4]
+    assert await t5 == 5
+    assert batches == [[1, 2], [3, 4], [5]]
+    await batcher.close()
+
+
+async def test_batcher_close(scheduler: Scheduler) -> None:
+    async def batch_fn(items: List[int]) -> List[int]:
+        await asyncio.sleep(0)
+        return items
+
+    async with Batcher(scheduler, batch_fn, max_delay=10) as batcher:
+        task = asyncio.create_task(batcher.submit(1))
+        await asyncio.sleep(0)
+        assert not task.done()
+    assert batcher.closed
+    assert await task == 1
+
+    with pytest.raises(RuntimeError):
+        await batcher.submit(2)
+
+
+async def test_batcher_scheduler_closed(scheduler: Scheduler) -> None:
+    async def batch_fn(items: List[int]) -> List[int]:
+        await asyncio.sleep(10)
+        return items
+
+    batcher = Batcher(scheduler, batch_fn, max_size=1)
+    task = asyncio.create_task(batcher.submit(1))
+    await asyncio.sleep(0.01)
+    await scheduler.close()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    with pytest.raises(RuntimeError, match="after closing"):
+        await batcher.submit(2)
+
+
+async def test_batcher_shed(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(
+        limit=1, pending_limit=1, overflow_policy="drop_newest"
+    )
+
+    async def batch_fn(items: List[int]) -> List[int]:
+        await asyncio.sleep(0.01)
+        return items
+
+    batcher = Batcher(scheduler, batch_fn, max_size=1)
+    results = await asyncio.gather(
+        *(batcher.submit(i) for i in range(3)), return_exceptions=True
+    )
+    assert results[:2] == [0, 1]
+    assert isinstance(results[2], asyncio.CancelledError)
+
+
+async def test_batcher_invalid_args(scheduler: Scheduler) -> None:
+    async def batch_fn(items: List[int]) -> List[int]:
+        return items
+
+    with pytest.raises(ValueError):
+        Batcher(scheduler, batch_fn, max_size=0)
+    with pytest.raises(ValueError):
+        Batcher(scheduler, batch_fn, max_delay=-1)
@@ -0,0 +1,227 @@
+import asyncio
+from collections.abc import Awaitable
+from contextlib import suppress
+from typing import Callable, NoReturn
+from unittest import mock
+
+import pytest
+
+from aiojobs import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitStats,
+    Job,
+    RetryPolicy,
+    Scheduler,
+)
+
+_MakeScheduler = Callable[..., Awaitable[Scheduler]]
+
+
+async def ok() -> str:
+    return "ok"
+
+
+async def fail() -> NoReturn:
+    raise RuntimeError()
+
+
+async def finish(job: "Job[object]") -> None:
+    with suppress(RuntimeError):
+        await job.wait()
+
+
+def test_circuit_breaker_defaults() -> None:
+    breaker = CircuitBreaker()
+    assert breaker.failure_threshold == 0.5
+    assert breaker.window == 20
+    assert breaker.min_calls == 5
+    assert breaker.reset_timeout == 30.0
+    assert breaker.half_open_max == 1
+    assert breaker.state("key") == "closed"
+    assert breaker.stats() == {}
+
+
+def test_circuit_breaker_invalid() -> None:
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_threshold=0)
+    with pytest.raises(ValueError):
+        CircuitBreaker(window=0)
+
+
+async def test_breaker_key_requires_breaker(scheduler: Scheduler) -> None:
+    assert scheduler.circuit_breaker is None
+    with pytest.raises(ValueError):
+        await scheduler.spawn(ok, breaker_key="key")
+
+
+async def test_circuit_opens(make_scheduler: _MakeScheduler) -> None:
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_threshold=0.5)
+    scheduler = await make_scheduler(
+        circuit_breaker=breaker, exception_handler=mock.Mock()
+    )
+    assert scheduler.circuit_breaker is breaker
+
+    for coro in (ok, fail, ok):
+        await finish(await scheduler.spawn(coro, breaker_key="key"))
+    assert breaker.state("key") == "closed"
+    assert breaker.stats() == {"key": CircuitStats("closed", 3, 1, 0)}
+
+    await finish(await scheduler.spawn(fail, breaker_key="key"))
+    assert breaker.state("key") == "open"
+
+    factory = mock.Mock()
+    with pytest.raises(CircuitOpenError) as ctx:
+        await scheduler.spawn(factory, breaker_key="key")
+    assert ctx.value.key == "key"
+    assert not factory.called
+    assert len(scheduler) == 0
+    assert breaker.stats()["key"].rejected == 1
+
+    # Other keys are not affected.
+    await finish(await scheduler.spawn(fail(), breaker_key="other"))
+    assert breaker.state("other") == "closed"
+
+
+async def test_circuit_sliding_window(make_scheduler: _MakeScheduler) -> None:
+    breaker = CircuitBreaker(window=2, min_calls=2, failure_threshold=1)
+    scheduler = await make_scheduler(
+        circuit_breaker=breaker, exception_handler=mock.Mock()
+    )
+
+    for coro in (fail, ok, fail, ok):
+        await finish(await scheduler.spawn(coro, breaker_key="key"))
+    assert breaker.state("key") == "closed"
+    assert breaker.stats()["key"] == CircuitStats("closed", 2, 1, 0)
+
+
+async def test_circuit_rejects_coroutine(make_scheduler: _MakeScheduler) -> None:
+    breaker = CircuitBreaker(window=1, min_calls=1)
+    scheduler = await make_scheduler(
+        circuit_breaker=breaker, exception_handler=mock.Mock()
+    )
+    await finish(await scheduler.spawn(fail(), breaker_key="key"))
+
+    # The coroutine is closed without a "never awaited" warning.
+    with pytest.raises(CircuitOpenError):
+        await scheduler.spawn(ok(), breaker_key="key")
+
+
+async def test_circuit_half_open(make_scheduler: _MakeScheduler) -> None:
+    breaker = CircuitBreaker(window=1, min_calls=1, reset_timeout=0.01)
+    scheduler = await make_scheduler(
+        circuit_breaker=breaker, exception_handler=mock.Mock()
+    )
+    await finish(await scheduler.spawn(fail, breaker_key="key"))
+    assert breaker.state("key") == "open"
+
+    await asyncio.sleep(0.02)
+    probe1 = await scheduler.spawn(fail, breaker_key="key")
+    assert breaker.state("key") == "half_open"
+    with pytest.raises(CircuitOpenError):
+        await scheduler.spawn(ok, breaker_key="key")
+    await finish(probe1)
+    assert breaker.state("key") == "open"
+
+    await asyncio.sleep(0.02)
+    probe2 = await scheduler.spawn(ok, breaker_key="key")
+    assert await probe2.wait() == "ok"
+    assert breaker.state("key") == "closed"
+    # The closed circuit has nothing to remember.
+    assert breaker.stats() == {}
+
+
+async def test_circuit_half_open_cancelled_probe(
+    make_scheduler: _MakeScheduler,
+) -> None:
+    breaker = CircuitBreaker(window=1, min_calls=1, reset_timeout=0.01)
+    scheduler = await make_scheduler(
+        circuit_breaker=breaker, exception_handler=mock.Mock()
+    )
+    await finish(await scheduler.spawn(fail, breaker_key="key"))
+    await asyncio.sleep(0.02)
+
+    async def slow() -> None:
+        await asyncio.sleep(10)
+
+    probe = await scheduler.spawn(slow, breaker_key="key")
+    await probe.close()
+    assert breaker.state("key") == "half_open"
+    # The probe slot is released, a new probe is admitted.
+    await scheduler.spawn(ok, breaker_key="key")
+
+
+async def test_circuit_half_open_invalid_spawn(
+    make_scheduler: _MakeScheduler,
+) -> None:
+    breaker = CircuitBreaker(window=1, min_calls=1, reset_timeout=0.01)
+    scheduler = await make_scheduler(
+        circuit_breaker=breaker, exception_handler=mock.Mock()
+    )
+    await finish(await scheduler.spawn(fail, breaker_key="key"))
+    await asyncio.sleep(0.02)
+
+    coro = ok()
+    with pytest.raises(TypeError):
+        await scheduler.spawn(coro, breaker_key="key", retry=RetryPolicy())
+    coro.close()
+
+    def broken() -> NoReturn:
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        await scheduler.spawn(broken, breaker_key="key")
+    # The probe slot isn't leaked by failed spawns.
+    probe = await scheduler.spawn(ok, breaker_key="key")
+    assert await probe.wait() == "ok"
+    assert breaker.state("key") == "closed"
+
+
+async def test_circuit_eviction(make_scheduler: _MakeScheduler) -> None:
+    breaker = CircuitBreaker(window=2, min_calls=2)
+    scheduler = await make_scheduler(
+        circuit_breaker=breaker, exception_handler=mock.Mock()
+    )
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def slow() -> None:
+        await fut
+
+    for i in range(100):
+        job = await scheduler.spawn(slow, breaker_key=i)
+        await job.close()
+    # Circuits without outcomes are dropped.
+    assert breaker.stats() == {}
+
+    running = await scheduler.spawn(slow, breaker_key="key")
+    cancelled = await scheduler.spawn(slow, breaker_key="key")
+    await cancelled.close()
+    # Kept while a job of the key is running.
+    assert "key" in breaker.stats()
+    fut.set_result(None)
+    await running.wait()
+    assert breaker.stats() == {"key": CircuitStats("closed", 1, 0, 0)}
+
+
+async def test_circuit_stale_outcomes(make_scheduler: _MakeScheduler) -> None:
+    breaker = CircuitBreaker(window=1, min_calls=1, reset_timeout=10)
+    scheduler = await make_scheduler(
+        circuit_breaker=breaker, exception_handler=mock.Mock()
+    )
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def slow() -> None:
+        await fut
+
+    job = await scheduler.spawn(slow, breaker_key="key")
+    await finish(await scheduler.spawn(fail, breaker_key="key"))
+    assert breaker.state("key") == "open"
+
+    fut.set_result(None)
+    await job.wait()
+    assert breaker.state("key") == "open"
+
+    breaker.reset("key")
+    assert breaker.state("key") == "closed"
+    breaker.reset()
+    assert breaker.stats() == {}
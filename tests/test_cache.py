@@ -0,0 +1,140 @@
+import asyncio
+from collections.abc import Awaitable
+from typing import Callable, NoReturn
+from unittest import mock
+
+import pytest
+
+from aiojobs import CacheInfo, Scheduler
+
+_MakeScheduler = Callable[..., Awaitable[Scheduler]]
+
+
+async def test_spawn_cached(scheduler: Scheduler) -> None:
+    factory = mock.Mock(side_effect=lambda: coro())
+
+    async def coro() -> int:
+        await asyncio.sleep(0)
+        return 1
+
+    job1 = await scheduler.spawn_cached("key", factory, ttl=10)
+    assert await job1.wait() == 1
+    assert scheduler.cache_info() == CacheInfo(0, 1, 0, 1024, 1)
+
+    job2 = await scheduler.spawn_cached("key", factory, ttl=10)
+    assert job2 is job1
+    assert job2.closed
+    assert await job2.wait() == 1
+    assert factory.call_count == 1
+    assert len(scheduler) == 0
+    assert scheduler.cache_info() == CacheInfo(1, 1, 0, 1024, 1)
+
+
+async def test_spawn_cached_coroutine_hit(scheduler: Scheduler) -> None:
+    async def coro() -> int:
+        return 1
+
+    job1 = await scheduler.spawn_cached("key", coro(), ttl=10)
+    await job1.wait()
+    # The coroutine is closed without a "never awaited" warning.
+    job2 = await scheduler.spawn_cached("key", coro(), ttl=10)
+    assert job2 is job1
+
+
+async def test_spawn_cached_inflight(scheduler: Scheduler) -> None:
+    fut: asyncio.Future[int] = asyncio.Future()
+    factory = mock.Mock(side_effect=lambda: coro())
+
+    async def coro() -> int:
+        return await fut
+
+    job1 = await scheduler.spawn_cached("key", factory, ttl=10)
+    job2 = await scheduler.spawn_cached("key", factory, ttl=10)
+    assert job1 is job2
+    assert factory.call_count == 1
+
+    fut.set_result(1)
+    await job1.wait()
+    assert scheduler.cache_info().currsize == 1
+
+
+async def test_spawn_cached_ttl(scheduler: Scheduler) -> None:
+    async def coro() -> int:
+        return 1
+
+    job1 = await scheduler.spawn_cached("key", coro, ttl=0.01)
+    await job1.wait()
+    await asyncio.sleep(0.02)
+
+    job2 = await scheduler.spawn_cached("key", coro, ttl=0.01)
+    assert job2 is not job1
+    assert scheduler.cache_info().misses == 2
+
+
+async def test_spawn_cached_lru(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(cache_size=2)
+
+    async def coro() -> int:
+        return 1
+
+    for key in ("a", "b"):
+        await (await scheduler.spawn_cached(key, coro, ttl=10)).wait()
+    # Touch "a" so "b" becomes the least recently used entry.
+    await scheduler.spawn_cached("a", coro, ttl=10)
+    await (await scheduler.spawn_cached("c", coro, ttl=10)).wait()
+
+    assert scheduler.cache_info() == CacheInfo(1, 3, 1, 2, 2)
+    assert set(scheduler._cache._entries) == {"a", "c"}
+
+
+async def test_spawn_cached_failures(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(exception_handler=mock.Mock())
+
+    async def coro() -> NoReturn:
+        raise RuntimeError()
+
+    job1 = await scheduler.spawn_cached("key", coro, ttl=10)
+    with pytest.raises(RuntimeError):
+        await job1.wait()
+    assert scheduler.cache_info().currsize == 0
+
+    job2 = await scheduler.spawn_cached("key", coro, ttl=10, cache_failures=True)
+    with pytest.raises(RuntimeError):
+        await job2.wait()
+    job3 = await scheduler.spawn_cached("key", coro, ttl=10, cache_failures=True)
+    assert job3 is job2
+    with pytest.raises(RuntimeError):
+        await job3.wait()
+
+
+async def test_spawn_cached_cancelled(scheduler: Scheduler) -> None:
+    async def coro() -> None:
+        await asyncio.sleep(1)
+
+    job = await scheduler.spawn_cached("key", coro, ttl=10)
+    await job.close()
+    assert scheduler.cache_info().currsize == 0
+    assert scheduler._cache._watched == {}
+
+
+async def test_cache_clear(scheduler: Scheduler) -> None:
+    async def coro() -> int:
+        return 1
+
+    await (await scheduler.spawn_cached("key", coro, ttl=10)).wait()
+    scheduler.cache_clear()
+    assert scheduler.cache_info().currsize == 0
+
+
+async def test_spawn_cached_after_close(scheduler: Scheduler) -> None:
+    async def coro() -> None:
+        pass
+
+    await scheduler.close()
+    with pytest.raises(RuntimeError):
+        await scheduler.spawn_cached("key", coro, ttl=10)
+
+
+async def test_cache_size_invalid(make_scheduler: _MakeScheduler) -> None:
+    with pytest.raises(ValueError):
+        await make_scheduler(cache_size=-1)
@@ -410,3 +410,215 @@ async def test_set_job_name(scheduler: Scheduler) -> None:
     assert job.get_name() == "changed_name"
     assert job._task is not None
     assert job._task.get_name() == "changed_name"
+
+
+async def test_job_status(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1, exception_handler=mock.Mock())
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def coro() -> None:
+        await fut
+
+    async def fail() -> NoReturn:
+        raise RuntimeError()
+
+    job1 = await scheduler.spawn(coro())
+    job2 = await scheduler.spawn(fail())
+    job3 = await scheduler.spawn(coro())
+    assert job1.status == "active"
+    assert job1.started_at is not None
+    assert job1.finished_at is None
+    assert job2.status == "pending"
+    assert job2.started_at is None
+
+    await job3.close()
+    assert job3.status == "cancelled"
+    assert job3.started_at is None
+    assert job3.finished_at is not None
+
+    fut.set_result(None)
+    await job1.wait()
+    assert job1.status == "done"  # type: ignore[comparison-overlap]
+    assert job1.finished_at is not None  # type: ignore[unreachable]
+    assert job1.finished_at >= job1.started_at
+    with pytest.raises(RuntimeError):
+        await job2.wait()
+    assert job2.status == "failed"
+
+
+async def test_job_status_cancelled(scheduler: Scheduler) -> None:
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    job = await scheduler.spawn(coro())
+    await asyncio.sleep(0)
+    await job.close()
+    assert job.status == "cancelled"
+
+
+@pytest.mark.parametrize("policy", ("drop", "weak"))
+async def test_result_policy_release(
+    make_scheduler: _MakeScheduler, policy: str
+) -> None:
+    scheduler = await make_scheduler(result_policy=policy)
+    assert scheduler.result_policy == policy
+
+    async def coro() -> str:
+        await asyncio.sleep(0)
+        return "result"
+
+    job = await scheduler.spawn(coro(), name="job")
+    # Callers waiting before completion receive the result.
+    assert await job.wait() == "result"
+    await asyncio.sleep(0)
+    assert job._task is None
+    assert job.status == "done"
+    assert job.get_name() == "job"
+    with pytest.raises(RuntimeError, match="released"):
+        await job.wait()
+
+
+async def test_result_policy_weak_alive(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler()
+
+    async def coro() -> str:
+        return "result"
+
+    job = await scheduler.spawn(coro(), result_policy="weak")
+    task = job._task
+    assert task is not None
+    await job.wait()
+    assert job._task is None
+    # The result is available while the task is referenced elsewhere.
+    assert await job.wait() == "result"
+    del task
+
+
+async def test_result_policy_failed(make_scheduler: _MakeScheduler) -> None:
+    exc_handler = mock.Mock()
+    scheduler = await make_scheduler(exception_handler=exc_handler)
+
+    async def fail() -> NoReturn:
+        raise RuntimeError()
+
+    job = await scheduler.spawn(fail(), result_policy="drop")
+    await asyncio.sleep(0.01)
+    assert exc_handler.called
+    assert job.status == "failed"
+    with pytest.raises(RuntimeError, match="released"):
+        await job.wait()
+
+
+async def test_result_policy_keep_overrides(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(result_policy="drop")
+
+    async def coro() -> str:
+        return "result"
+
+    job = await scheduler.spawn(coro(), result_policy="keep")
+    await job.wait()
+    assert await job.wait() == "result"
+
+
+async def test_result_policy_invalid(make_scheduler: _MakeScheduler) -> None:
+    with pytest.raises(ValueError, match="Unknown result policy"):
+        await make_scheduler(result_policy="unknown")
+    scheduler = await make_scheduler()
+
+    async def coro() -> None:
+        pass
+
+    with pytest.raises(ValueError, match="Unknown result policy"):
+        await scheduler.spawn(coro, result_policy="unknown")  # type: ignore[arg-type]
+
+
+async def test_job_started_future_lazy(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def coro() -> None:
+        await fut
+
+    job1 = await scheduler.spawn(coro())
+    job2 = await scheduler.spawn(coro())
+    assert job1._started is None
+    assert job2._started is None
+
+    waiter = asyncio.create_task(job2.wait())
+    await asyncio.sleep(0.01)
+    assert job2._started is not None
+    fut.set_result(None)  # type: ignore[unreachable]
+    await job1.wait()
+    await waiter
+    assert job2.status == "done"
+
+
+async def test_job_join(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def coro() -> int:
+        await fut
+        return 1
+
+    job1 = await scheduler.spawn(coro())
+    job2 = await scheduler.spawn(coro())
+    joiner1 = asyncio.create_task(job1._join())
+    joiner2 = asyncio.create_task(job2._join())
+    await asyncio.sleep(0)
+
+    # Cancelling a waiter doesn't cancel the job, even a pending one.
+    joiner1.cancel()
+    joiner2.cancel()
+    await asyncio.sleep(0)
+    assert job1.active
+    assert job2.pending
+
+    fut.set_result(None)
+    assert await job2._join() == 1
+    assert await job1._join() == 1
+
+
+@pytest.mark.parametrize("result_policy", ["drop", "weak"])
+async def test_job_join_pending_released_result(
+    make_scheduler: _MakeScheduler, result_policy: str
+) -> None:
+    scheduler = await make_scheduler(limit=1, result_policy=result_policy)
+
+    async def coro() -> int:
+        return 42
+
+    job1 = await scheduler.spawn(coro())
+    job2 = await scheduler.spawn(coro())
+    # The result of the pending job is received although the job releases
+    # its task right after finishing.
+    results = await asyncio.gather(job1._join(), job2._join())
+    assert list(results) == [42, 42]
+
+
+async def test_job_join_exception(make_scheduler: _MakeScheduler) -> None:
+    exc_handler = mock.Mock()
+    scheduler = await make_scheduler(exception_handler=exc_handler)
+
+    async def coro() -> NoReturn:
+        raise RuntimeError()
+
+    job = await scheduler.spawn(coro())
+    with pytest.raises(RuntimeError):
+        await job._join()
+    assert not exc_handler.called
+
+
+async def test_job_join_closed_pending(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    await scheduler.spawn(coro())
+    job = await scheduler.spawn(coro())
+    joiner = asyncio.create_task(job._join())
+    await asyncio.sleep(0)
+    await job.close()
+    with pytest.raises(asyncio.CancelledError):
+        await joiner
@@ -0,0 +1,93 @@
+import asyncio
+from collections.abc import Awaitable
+from typing import Callable, NoReturn
+from unittest import mock
+
+import pytest
+from aiohttp import ClientSession, web
+
+from aiojobs import Scheduler, SchedulerMetrics
+from aiojobs._metrics import Histogram, render_prometheus
+from aiojobs.aiohttp import metrics_handler
+from aiojobs.aiohttp import setup as aiojobs_setup
+
+_MakeScheduler = Callable[..., Awaitable[Scheduler]]
+_Client = Callable[[web.Application], Awaitable[ClientSession]]
+
+
+async def fail() -> NoReturn:
+    raise RuntimeError()
+
+
+def test_histogram() -> None:
+    hist = Histogram((1, 2))
+    for value in (0.5, 1, 1.5, 3):
+        hist.observe(value)
+    assert hist.count == 4
+    assert hist.sum == 6
+    assert hist.cumulative() == [(1, 2), (2, 3), (float("inf"), 4)]
+
+
+def test_histogram_invalid_buckets() -> None:
+    with pytest.raises(ValueError):
+        Histogram(())
+    with pytest.raises(ValueError):
+        Histogram((2, 1))
+
+
+async def test_metrics_disabled(scheduler: Scheduler) -> None:
+    assert scheduler.metrics is None
+    text = render_prometheus(scheduler)
+    assert "aiojobs_active_jobs 0" in text
+    assert "aiojobs_limit 100" in text
+    assert "aiojobs_spawned_total" not in text
+    # Jobs don't record their spawn time without metrics.
+    job = await scheduler.spawn(asyncio.sleep(0))
+    assert job._created_at is None
+    await job.wait()
+
+
+async def test_metrics_counters(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(
+        metrics=True, limit=1, exception_handler=mock.Mock()
+    )
+    metrics = scheduler.metrics
+    assert isinstance(metrics, SchedulerMetrics)
+
+    await scheduler.spawn(asyncio.sleep(0))
+    await scheduler.spawn(fail())
+    pending = await scheduler.spawn(asyncio.sleep(10))
+    assert metrics.spawned == 3
+    assert pending._created_at is not None
+    await pending.close()
+    await scheduler.wait_and_close()
+
+    assert (metrics.completed, metrics.failed, metrics.cancelled) == (1, 1, 1)
+    # The pending job has never been started.
+    assert metrics.queue_wait.count == 2
+    assert metrics.run_time.count == 2
+
+
+async def test_render_prometheus(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(metrics=True, limit=None)
+    await (await scheduler.spawn(asyncio.sleep(0))).wait()
+
+    text = render_prometheus(scheduler, prefix="app")
+    assert "# TYPE app_spawned_total counter\napp_spawned_total 1\n" in text
+    assert "app_completed_total 1\n" in text
+    assert 'app_run_seconds_bucket{le="+Inf"} 1\n' in text
+    assert "app_queue_wait_seconds_count 1\n" in text
+    assert "app_limit" not in text
+
+
+async def test_metrics_handler(aiohttp_client: _Client) -> None:
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler())
+    aiojobs_setup(app, metrics=True)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/metrics")
+    assert resp.status == 200
+    assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert "aiojobs_spawned_total 0\n" in await resp.text()
+    await client.close()
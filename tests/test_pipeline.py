@@ -0,0 +1,142 @@
+import asyncio
+from typing import List, NoReturn
+from unittest import mock
+
+import pytest
+
+from aiojobs import Pipeline, Stage
+
+
+async def test_pipeline() -> None:
+    written: List[str] = []
+
+    async def parse(item: int) -> int:
+        return item * 2
+
+    async def enrich(item: int) -> str:
+        await asyncio.sleep(0)
+        return f"item{item}"
+
+    async def write(item: str) -> None:
+        written.append(item)
+
+    pipeline = Pipeline(
+        [Stage(parse, name="parse"), Stage(enrich, limit=2), Stage(write, limit=1)]
+    )
+    assert repr(pipeline) == "<Pipeline parse -> stage1 -> stage2>"
+    for i in range(10):
+        await pipeline.put(i)
+    await pipeline.wait_and_close()
+
+    assert sorted(written) == sorted(f"item{i * 2}" for i in range(10))
+    assert pipeline.closed
+    assert all(scheduler.closed for scheduler in pipeline.schedulers)
+    stats = pipeline.stats()
+    assert [s.name for s in stats] == ["parse", "stage1", "stage2"]
+    assert [s.processed for s in stats] == [10, 10, 10]
+    assert all(s.queued == 0 and s.active == 0 for s in stats)
+    assert all(s.throughput > 0 for s in stats)
+    with pytest.raises(RuntimeError):
+        await pipeline.put(1)
+
+
+async def test_pipeline_backpressure() -> None:
+    fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+    async def fast(item: int) -> int:
+        return item
+
+    async def slow(item: int) -> None:
+        await fut
+
+    pipeline = Pipeline(
+        [Stage(fast, limit=1, queue_size=1), Stage(slow, limit=1, queue_size=1)]
+    )
+    put = 0
+
+    async def producer() -> None:
+        nonlocal put
+        while True:
+            await pipeline.put(put)
+            put += 1
+
+    task = asyncio.create_task(producer())
+    await asyncio.sleep(0.05)
+    # The slow stage holds 1 job, 1 pending job and 1 queued item, the fast
+    # one blocks on the full queue, the producer on the first queue.
+    assert put < 10
+    stats = pipeline.stats()
+    assert stats[1].active == 1
+    assert stats[1].mean_latency == 0
+    task.cancel()
+    fut.set_result(None)
+    await pipeline.wait_and_close()
+    stats = pipeline.stats()
+    # Accepted items have passed through both stages.
+    assert stats[0].processed == stats[1].processed > 0
+
+
+async def test_pipeline_failure() -> None:
+    handler = mock.Mock()
+    written: List[int] = []
+
+    async def check(item: int) -> int:
+        if item % 2:
+            raise ValueError(item)
+        return item
+
+    async def write(item: int) -> None:
+        written.append(item)
+
+    async with Pipeline([Stage(check), Stage(write)], exception_handler=handler) as p:
+        for i in range(4):
+            await p.put(i)
+    assert sorted(written) == [0, 2]
+    assert p.stats()[0].failed == 2
+    assert handler.call_count == 2
+
+
+async def test_pipeline_close() -> None:
+    async def slow(item: int) -> NoReturn:
+        await asyncio.sleep(10)
+        raise AssertionError
+
+    pipeline = Pipeline([Stage(slow)])
+    await pipeline.put(1)
+    await asyncio.sleep(0)
+    await pipeline.close()
+    assert pipeline.schedulers[0].closed
+    assert pipeline.stats()[0].processed == 0
+
+
+async def test_pipeline_wait_timeout() -> None:
+    async def slow(item: int) -> None:
+        await asyncio.sleep(10)
+
+    pipeline = Pipeline([Stage(slow)])
+    await pipeline.put(1)
+    await pipeline.wait_and_close(timeout=0.01)
+    assert pipeline.schedulers[0].closed
+
+
+async def test_pipeline_default_wait_timeout() -> None:
+    async def slow(item: int) -> None:
+        await asyncio.sleep(10)
+
+    async with Pipeline([Stage(slow)], wait_timeout=0.01) as pipeline:
+        assert pipeline.wait_timeout == 0.01
+        await pipeline.put(1)
+    assert pipeline.schedulers[0].closed
+    assert Pipeline([Stage(slow)]).wait_timeout == 60
+
+
+def test_pipeline_invalid() -> None:
+    async def fn(item: int) -> int:
+        return item
+
+    with pytest.raises(ValueError):
+        Pipeline([])
+    with pytest.raises(ValueError):
+        Pipeline([Stage(fn, limit=0)])
+    with pytest.raises(ValueError):
+        Pipeline([Stage(fn, queue_size=0)])
@@ -0,0 +1,193 @@
+import asyncio
+from collections.abc import Awaitable
+from typing import Callable, NoReturn
+from unittest import mock
+
+import pytest
+
+from aiojobs import RetryPolicy, Scheduler
+
+_MakeScheduler = Callable[..., Awaitable[Scheduler]]
+
+
+def test_retry_policy_defaults() -> None:
+    policy = RetryPolicy()
+    assert policy.max_attempts == 3
+    assert policy.backoff == 0.1
+    assert policy.multiplier == 2.0
+    assert policy.max_backoff == 10.0
+    assert policy.jitter == 0.1
+    assert policy.retry_on is Exception
+    assert repr(policy).startswith("<RetryPolicy max_attempts=3")
+
+
+def test_retry_policy_invalid() -> None:
+    with pytest.raises(ValueError):
+        RetryPolicy(0)
+    with pytest.raises(ValueError):
+        RetryPolicy(backoff=-1)
+    with pytest.raises(ValueError):
+        RetryPolicy(jitter=2)
+    with pytest.raises(ValueError, match="multiplier"):
+        RetryPolicy(multiplier=0.5)
+
+
+def test_retry_policy_delay() -> None:
+    policy = RetryPolicy(backoff=1, multiplier=2, max_backoff=5, jitter=0)
+    assert [policy.delay(i) for i in range(1, 5)] == [1, 2, 4, 5]
+
+    # Late attempts don't overflow.
+    policy = RetryPolicy(5000, jitter=0)
+    assert policy.delay(4999) == 10.0
+    policy = RetryPolicy(5000, multiplier=1, jitter=0)
+    assert policy.delay(4999) == 0.1
+
+    policy = RetryPolicy(backoff=1, jitter=0.5)
+    for _ in range(100):
+        assert 0.5 <= policy.delay(1) <= 1.5
+
+
+def test_retry_policy_should_retry() -> None:
+    policy = RetryPolicy(2, retry_on=(KeyError, ValueError))
+    assert policy.should_retry(KeyError(), 1)
+    assert not policy.should_retry(KeyError(), 2)
+    assert not policy.should_retry(RuntimeError(), 1)
+
+
+async def test_spawn_retry(scheduler: Scheduler) -> None:
+    calls = 0
+
+    async def coro() -> int:
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            raise RuntimeError()
+        return calls
+
+    job = await scheduler.spawn(coro, retry=RetryPolicy(3, backoff=0))
+    assert await job.wait() == 3
+    assert job.attempts == 3
+    assert scheduler.retry_count == 2
+
+
+async def test_spawn_retry_final_failure(make_scheduler: _MakeScheduler) -> None:
+    exc_handler = mock.Mock()
+    scheduler = await make_scheduler(exception_handler=exc_handler)
+    excs = []
+
+    async def coro() -> NoReturn:
+        exc = RuntimeError()
+        excs.append(exc)
+        raise exc
+
+    job = await scheduler.spawn(coro, retry=RetryPolicy(3, backoff=0))
+    await asyncio.sleep(0.01)
+
+    assert job.closed
+    assert job.attempts == 3
+    assert len(excs) == 3
+    expect = {"exception": excs[-1], "job": job, "message": "Job processing failed"}
+    if asyncio.get_running_loop().get_debug():
+        expect["source_traceback"] = mock.ANY
+    exc_handler.assert_called_once_with(scheduler, expect)
+
+
+async def test_spawn_retry_on(scheduler: Scheduler) -> None:
+    async def coro() -> NoReturn:
+        raise KeyError()
+
+    job = await scheduler.spawn(coro, retry=RetryPolicy(3, retry_on=ValueError))
+    with pytest.raises(KeyError):
+        await job.wait()
+    assert job.attempts == 1
+    assert scheduler.retry_count == 0
+
+
+async def test_spawn_retry_requires_factory(scheduler: Scheduler) -> None:
+    async def coro() -> None:
+        pass
+
+    c = coro()
+    with pytest.raises(TypeError):
+        await scheduler.spawn(c, retry=RetryPolicy())
+    await c
+
+
+async def test_retry_backoff_releases_slot(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+    failed = False
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def flaky() -> str:
+        nonlocal failed
+        if not failed:
+            failed = True
+            raise RuntimeError()
+        return "flaky"
+
+    async def other() -> str:
+        await fut
+        return "other"
+
+    job1 = await scheduler.spawn(flaky, retry=RetryPolicy(2, backoff=0.01))
+    job2 = await scheduler.spawn(other())
+    assert job2.pending
+
+    await asyncio.sleep(0)
+    # job1 failed and waits for the retry outside of the limit.
+    assert job1.active
+    assert job2.active
+    assert scheduler.active_count == 1
+
+    await asyncio.sleep(0.02)
+    # No free slot, job1 waits for it ahead of pending jobs.
+    assert scheduler.active_count == 1
+    job3 = await scheduler.spawn(other())
+    assert job3.pending
+
+    fut.set_result(None)
+    assert await job2.wait() == "other"
+    assert await job1.wait() == "flaky"
+    assert await job3.wait() == "other"
+    assert scheduler.active_count == 0
+    assert len(scheduler) == 0
+
+
+async def test_retry_close_during_backoff(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+
+    async def coro() -> NoReturn:
+        raise RuntimeError()
+
+    job = await scheduler.spawn(coro, retry=RetryPolicy(2, backoff=10))
+    await asyncio.sleep(0)
+    assert scheduler.active_count == 0
+
+    await job.close()
+    assert job.closed
+    assert scheduler._backoff_count == 0
+    assert scheduler.active_count == 0
+
+
+async def test_retry_close_waiting_for_slot(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def flaky() -> NoReturn:
+        raise RuntimeError()
+
+    async def other() -> None:
+        await fut
+
+    job1 = await scheduler.spawn(flaky, retry=RetryPolicy(2, backoff=0))
+    job2 = await scheduler.spawn(other())
+    await asyncio.sleep(0.01)
+    assert len(scheduler._retry_waiters) == 1
+
+    await job1.close()
+    assert scheduler._backoff_count == 0
+    assert scheduler.active_count == 1
+
+    fut.set_result(None)
+    await job2.wait()
+    assert scheduler.active_count == 0
@@ -1,7 +1,9 @@
 import asyncio
+import contextvars
 import sys
-from collections.abc import Awaitable
-from typing import Callable, List, NoReturn
+from collections.abc import AsyncIterator, Awaitable, Coroutine
+from functools import partial
+from typing import Any, Callable, Dict, List, NoReturn, Tuple
 from unittest import mock
 
 import pytest
@@ -667,3 +669,939 @@ def test_scheduler_must_be_created_within_running_loop() -> None:
         Scheduler(close_timeout=0, limit=0, pending_limit=0, exception_handler=None)
 
     assert exc_info.match("no (current|running) event loop")
+
+
+async def test_overflow_policy(make_scheduler: _MakeScheduler) -> None:
+    s1 = await make_scheduler()
+    assert s1.overflow_policy == "block"
+    s2 = await make_scheduler(overflow_policy="reject")
+    assert s2.overflow_policy == "reject"
+
+    with pytest.raises(ValueError, match="Unknown overflow policy"):
+        await make_scheduler(overflow_policy="unknown")
+
+
+async def test_overflow_policy_reject(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1, pending_limit=1, overflow_policy="reject")
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def coro() -> None:
+        await fut
+
+    await scheduler.spawn(coro())
+    await scheduler.spawn(coro())
+    assert scheduler.shed_count == 0
+
+    with pytest.raises(asyncio.QueueFull):
+        await scheduler.spawn(coro())
+
+    assert scheduler.shed_count == 1
+    assert len(scheduler) == 2
+    assert scheduler.active_count == 1
+    assert scheduler.pending_count == 1
+
+
+async def test_overflow_policy_drop_newest(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(
+        limit=1, pending_limit=1, overflow_policy="drop_newest"
+    )
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def coro() -> None:
+        await fut
+
+    await scheduler.spawn(coro())
+    job2 = await scheduler.spawn(coro())
+    job3 = await scheduler.spawn(coro())
+
+    assert job2.pending
+    assert job3.closed
+    assert job3 not in scheduler
+    assert scheduler.shed_count == 1
+    assert scheduler.pending_count == 1
+    with pytest.raises(asyncio.CancelledError):
+        await job3.wait()
+
+
+async def test_overflow_policy_drop_oldest(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(
+        limit=1, pending_limit=1, overflow_policy="drop_oldest"
+    )
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def coro() -> None:
+        await fut
+
+    job1 = await scheduler.spawn(coro())
+    job2 = await scheduler.spawn(coro())
+    waiter = asyncio.create_task(job2.wait())
+    await asyncio.sleep(0)
+    job3 = await scheduler.spawn(coro())
+
+    assert job2.closed
+    assert job2 not in scheduler
+    assert job3.pending
+    assert scheduler.shed_count == 1
+    assert scheduler.active_count == 1
+    assert scheduler.pending_count == 1
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    fut.set_result(None)
+    await job1.wait()
+    await job3.wait()
+    assert len(scheduler) == 0
+
+
+async def test_overflow_policy_drop_oldest_skips_closed(
+    make_scheduler: _MakeScheduler,
+) -> None:
+    scheduler = await make_scheduler(
+        limit=1, pending_limit=1, overflow_policy="drop_oldest"
+    )
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def coro() -> None:
+        await fut
+
+    await scheduler.spawn(coro())
+    job2 = await scheduler.spawn(coro())
+    await job2.close()
+    job3 = await scheduler.spawn(coro())
+
+    assert job3.pending
+    assert scheduler.shed_count == 0
+
+
+async def test_watermarks(make_scheduler: _MakeScheduler) -> None:
+    s1 = await make_scheduler()
+    assert s1.high_watermark is None
+    assert s1.low_watermark is None
+    s2 = await make_scheduler(high_watermark=10)
+    assert s2.high_watermark == 10
+    assert s2.low_watermark == 5
+    s3 = await make_scheduler(high_watermark=10, low_watermark=8)
+    assert s3.low_watermark == 8
+
+    with pytest.raises(ValueError):
+        await make_scheduler(low_watermark=1)
+    with pytest.raises(ValueError):
+        await make_scheduler(high_watermark=1, low_watermark=2)
+
+
+async def test_watermark_callbacks(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1, high_watermark=3, low_watermark=1)
+    on_high = mock.Mock()
+    on_low = mock.Mock()
+    scheduler.add_watermark_callbacks(on_high, on_low)
+    futures: List[asyncio.Future[None]] = [asyncio.Future() for _ in range(3)]
+
+    async def coro(fut: "asyncio.Future[None]") -> None:
+        await fut
+
+    jobs = [await scheduler.spawn(coro(fut)) for fut in futures[:2]]
+    assert not scheduler.congested
+    assert not on_high.called
+
+    jobs.append(await scheduler.spawn(coro(futures[2])))
+    assert scheduler.congested
+    on_high.assert_called_once_with()  # type: ignore[unreachable]
+
+    futures[0].set_result(None)
+    await jobs[0].wait()
+    assert scheduler.congested
+    assert not on_low.called
+
+    futures[1].set_result(None)
+    await jobs[1].wait()
+    assert not scheduler.congested
+    on_low.assert_called_once_with()
+    on_high.assert_called_once_with()
+
+    scheduler.remove_watermark_callbacks(on_high, on_low)
+    await scheduler.close()
+    on_low.assert_called_once_with()
+
+
+async def test_watermark_callback_failed(make_scheduler: _MakeScheduler) -> None:
+    exc_handler = mock.Mock()
+    scheduler = await make_scheduler(high_watermark=1, exception_handler=exc_handler)
+    exc = RuntimeError()
+    on_high = mock.Mock(side_effect=exc)
+    scheduler.add_watermark_callbacks(on_high, mock.Mock())
+
+    async def coro() -> None:
+        await asyncio.sleep(1)
+
+    await scheduler.spawn(coro())
+    assert scheduler.congested
+    exc_handler.assert_called_once_with(
+        scheduler,
+        {"message": "Watermark callback failed", "exception": exc, "callback": on_high},
+    )
+
+
+async def test_wait_for_capacity(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(high_watermark=2, low_watermark=0)
+    fut1: asyncio.Future[None] = asyncio.Future()
+    fut2: asyncio.Future[None] = asyncio.Future()
+
+    async def coro(fut: "asyncio.Future[None]") -> None:
+        await fut
+
+    # Not congested, returns immediately.
+    await scheduler.wait_for_capacity()
+
+    job1 = await scheduler.spawn(coro(fut1))
+    job2 = await scheduler.spawn(coro(fut2))
+    assert scheduler.congested
+
+    waiter = asyncio.create_task(scheduler.wait_for_capacity())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    fut1.set_result(None)
+    await job1.wait()
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    fut2.set_result(None)
+    await job2.wait()
+    await asyncio.wait_for(waiter, 1)
+    assert not scheduler.congested
+
+
+async def test_spawn_factory(scheduler: Scheduler) -> None:
+    async def coro() -> int:
+        return 1
+
+    job = await scheduler.spawn(coro)
+    assert await job.wait() == 1
+
+
+async def test_spawn_dedup_key(scheduler: Scheduler) -> None:
+    fut: asyncio.Future[int] = asyncio.Future()
+    factory = mock.Mock(side_effect=lambda: coro())
+
+    async def coro() -> int:
+        return await fut
+
+    job1 = await scheduler.spawn(factory, dedup_key="key")
+    job2 = await scheduler.spawn(factory, dedup_key="key")
+    job3 = await scheduler.spawn(coro(), dedup_key="key")
+    assert job1 is job2 is job3
+    assert factory.call_count == 1
+    assert len(scheduler) == 1
+
+    other = await scheduler.spawn(factory, dedup_key="other")
+    assert other is not job1
+    assert len(scheduler) == 2
+
+    fut.set_result(1)
+    results = await asyncio.gather(job1.wait(), job2.wait(), other.wait())
+    assert list(results) == [1, 1, 1]
+    assert scheduler._dedup == {}
+
+    job4 = await scheduler.spawn(factory, dedup_key="key")
+    assert job4 is not job1
+    assert await job4.wait() == 1
+
+
+async def test_spawn_dedup_key_pending(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def coro() -> None:
+        await fut
+
+    await scheduler.spawn(coro())
+    job1 = await scheduler.spawn(coro, dedup_key="key")
+    job2 = await scheduler.spawn(coro, dedup_key="key")
+    assert job1.pending
+    assert job1 is job2
+    assert scheduler.pending_count == 1
+
+
+async def test_spawn_dedup_key_closed(scheduler: Scheduler) -> None:
+    async def coro() -> None:
+        await asyncio.sleep(1)
+
+    job1 = await scheduler.spawn(coro, dedup_key="key")
+    closing = asyncio.create_task(job1.close())
+    await asyncio.sleep(0)
+    # The key is still indexed but the job is closing.
+    assert job1.closed
+    job2 = await scheduler.spawn(coro, dedup_key="key")
+    assert job2 is not job1
+
+    await closing
+    assert scheduler._dedup == {"key": job2}
+
+
+async def test_spawn_dedup_key_shed(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(
+        limit=1, pending_limit=1, overflow_policy="drop_oldest"
+    )
+
+    async def coro() -> None:
+        await asyncio.sleep(1)
+
+    await scheduler.spawn(coro())
+    job1 = await scheduler.spawn(coro, dedup_key="key")
+    await scheduler.spawn(coro())
+    assert job1.closed
+    assert "key" not in scheduler._dedup
+
+
+async def test_spawn_tags(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def coro() -> None:
+        await fut
+
+    job1 = await scheduler.spawn(coro(), tags=("user:1", "request:1"))
+    job2 = await scheduler.spawn(coro(), tags=["user:1"])
+    job3 = await scheduler.spawn(coro())
+    job4 = await scheduler.spawn(coro(), tags=[])
+    assert job1.tags == {"user:1", "request:1"}
+    assert job3.tags == frozenset()
+    # Untagged jobs share the empty set.
+    assert job4.tags is job3.tags
+    assert scheduler.jobs_by_tag("user:1") == {job1, job2}
+    assert scheduler.jobs_by_tag("request:1") == {job1}
+    assert scheduler.jobs_by_tag("unknown") == frozenset()
+    assert scheduler.count_by_tag("user:1") == 2
+    assert scheduler.count_by_tag("unknown") == 0
+
+    fut.set_result(None)
+    await job1.wait()
+    await job2.wait()
+    assert scheduler.count_by_tag("user:1") == 0
+    assert scheduler._tags == {}
+
+
+async def test_close_tagged(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+
+    async def coro() -> None:
+        await asyncio.sleep(1)
+
+    job1 = await scheduler.spawn(coro(), tags=("user:1",))
+    job2 = await scheduler.spawn(coro(), tags=("user:1",))
+    job3 = await scheduler.spawn(coro(), tags=("user:2",))
+    assert job2.pending
+
+    await scheduler.close_tagged("user:1")
+    await scheduler.close_tagged("unknown")
+    assert job1.closed
+    assert job2.closed
+    assert not job3.closed
+    assert job3.active
+    assert scheduler.count_by_tag("user:1") == 0
+    assert list(scheduler) == [job3]
+
+
+async def test_spawn_tags_shed(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(
+        limit=1, pending_limit=1, overflow_policy="drop_newest"
+    )
+
+    async def coro() -> None:
+        await asyncio.sleep(1)
+
+    await scheduler.spawn(coro())
+    await scheduler.spawn(coro())
+    job = await scheduler.spawn(coro(), tags=("tag",))
+    assert job.closed
+    assert scheduler.count_by_tag("tag") == 0
+
+
+async def test_close_shared_deadline(make_scheduler: _MakeScheduler) -> None:
+    exc_handler = mock.Mock()
+    scheduler = await make_scheduler(
+        exception_handler=exc_handler, close_timeout=0.05, limit=None
+    )
+
+    async def stubborn() -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(10)
+
+    async def polite() -> None:
+        await asyncio.sleep(10)
+
+    stragglers = [await scheduler.spawn(stubborn()) for _ in range(10)]
+    others = [await scheduler.spawn(polite()) for _ in range(100)]
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await scheduler.close()
+    # A single deadline for all jobs, not one after another.
+    assert loop.time() - start < 0.5
+
+    assert all(job.closed for job in stragglers + others)
+    assert exc_handler.call_count == 10
+    reported = {call[0][1]["job"] for call in exc_handler.call_args_list}
+    assert reported == set(stragglers)
+    for job in stragglers:
+        assert job._task is not None
+        job._task.cancel()
+
+
+async def test_close_pending_without_task(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    job1 = await scheduler.spawn(coro())
+    job2 = await scheduler.spawn(coro())
+    await scheduler.close()
+
+    assert job1.closed
+    assert job2.closed
+    assert job2._task is None
+    with pytest.raises(asyncio.CancelledError):
+        await job2.wait()
+
+
+async def test_close_with_blocked_spawn(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1, pending_limit=1)
+
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    await scheduler.spawn(coro())
+    await scheduler.spawn(coro())
+    spawning = asyncio.create_task(scheduler.spawn(coro()))
+    await asyncio.sleep(0)
+    assert not spawning.done()
+
+    await scheduler.close()
+    assert len(scheduler) == 0
+    # Emptying the pending queue wakes the producer up, its job is not admitted.
+    job = await spawning
+    assert job.closed
+    assert job._task is None
+    assert len(scheduler) == 0
+    assert scheduler.pending_count == 0
+
+
+async def test_close_pending_frees_slot(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1, pending_limit=1)
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def coro() -> None:
+        await fut
+
+    await scheduler.spawn(coro())
+    job2 = await scheduler.spawn(coro())
+    spawning = asyncio.create_task(scheduler.spawn(coro()))
+    await asyncio.sleep(0)
+    assert not spawning.done()
+
+    await job2.close()
+    assert job2.closed
+    assert job2._task is None
+    assert scheduler.pending_count == 0
+    assert len(scheduler) == 1
+    # The blocked producer takes the released slot right away.
+    job3 = await spawning
+    assert job3.pending
+    assert scheduler.pending_count == 1
+
+
+async def test_spawn_cancelled_frees_slot(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1, pending_limit=1)
+    fut: asyncio.Future[None] = asyncio.Future()
+
+    async def coro() -> None:
+        await fut
+
+    await scheduler.spawn(coro())
+    await scheduler.spawn(coro())
+    spawning1 = asyncio.create_task(scheduler.spawn(coro()))
+    spawning2 = asyncio.create_task(scheduler.spawn(coro()))
+    await asyncio.sleep(0)
+
+    spawning1.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await spawning1
+    assert len(scheduler) == 2
+
+    fut.set_result(None)
+    job = await spawning2
+    await job.wait()
+    assert len(scheduler) == 0
+
+
+async def test_task_factory(make_scheduler: _MakeScheduler) -> None:
+    calls: List[Dict[str, Any]] = []
+
+    def factory(
+        loop: asyncio.AbstractEventLoop,
+        coro: Coroutine[object, object, object],
+        **kwargs: Any,
+    ) -> "asyncio.Task[object]":
+        calls.append(kwargs)
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+    scheduler = await make_scheduler(task_factory=factory)
+    assert scheduler.task_factory is factory
+
+    async def coro() -> int:
+        return 1
+
+    job = await scheduler.spawn(coro(), name="job")
+    assert await job.wait() == 1
+    assert job.get_name() == "job"
+    assert calls == [{"name": "job"}]
+
+    ctx = contextvars.copy_context()
+    await (await scheduler.spawn(coro(), context=ctx)).wait()
+    if sys.version_info >= (3, 11):
+        assert calls[1] == {"name": None, "context": ctx}
+    else:
+        assert calls[1] == {"name": None}
+
+
+async def test_task_factory_invalid(make_scheduler: _MakeScheduler) -> None:
+    with pytest.raises(TypeError):
+        await make_scheduler(task_factory=1)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="Requires Python 3.11+")
+async def test_spawn_context_shared(scheduler: Scheduler) -> None:
+    var: contextvars.ContextVar[int] = contextvars.ContextVar("var", default=0)
+    ctx = contextvars.copy_context()
+
+    async def coro() -> None:
+        var.set(var.get() + 1)
+
+    for _ in range(3):
+        await (await scheduler.spawn(coro(), context=ctx)).wait()
+    # The jobs share the context instead of copying it.
+    assert ctx[var] == 3
+    assert var.get() == 0
+
+
+async def test_spawn_context_task_factory(make_scheduler: _MakeScheduler) -> None:
+    var: contextvars.ContextVar[str] = contextvars.ContextVar("var", default="")
+    scheduler = await make_scheduler(
+        task_factory=lambda loop, coro, **kwargs: asyncio.Task(
+            coro, loop=loop, **kwargs
+        )
+    )
+
+    async def coro() -> str:
+        return var.get()
+
+    ctx = contextvars.copy_context()
+    ctx.run(var.set, "value")
+    job = await scheduler.spawn(coro(), context=ctx)
+    assert await job.wait() == "value"
+
+
+async def test_drain(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler()
+    progress: List[Tuple[int, int]] = []
+
+    async def coro(delay: float) -> None:
+        await asyncio.sleep(delay)
+
+    fast = await scheduler.spawn(coro(0.01))
+    slow = await scheduler.spawn(coro(10))
+    draining = asyncio.create_task(
+        scheduler.drain(
+            0.1, on_progress=lambda *args: progress.append(args), interval=0.02
+        )
+    )
+    await asyncio.sleep(0)
+    assert scheduler.draining
+    with pytest.raises(RuntimeError, match="draining"):
+        await scheduler.spawn(partial(coro, 0))
+
+    await draining
+    assert scheduler.closed
+    assert fast.status == "done"
+    assert slow.status == "cancelled"
+    assert progress[0] == (2, 0)
+    assert (1, 0) in progress
+    assert progress[-1] == (0, 0)
+
+
+async def test_drain_progress_callback_failed(make_scheduler: _MakeScheduler) -> None:
+    exc_handler = mock.Mock()
+    scheduler = await make_scheduler(exception_handler=exc_handler)
+    exc = RuntimeError()
+    on_progress = mock.Mock(side_effect=exc)
+
+    await scheduler.spawn(asyncio.sleep(0.05))
+    await scheduler.drain(on_progress=on_progress, interval=0.01)
+    assert scheduler.closed
+    # Reported on every call, the reporter keeps running.
+    assert on_progress.call_count > 2
+    assert exc_handler.call_count == on_progress.call_count
+    exc_handler.assert_called_with(
+        scheduler,
+        {
+            "message": "Progress callback failed",
+            "exception": exc,
+            "callback": on_progress,
+        },
+    )
+
+
+async def test_drain_deadlines(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler()
+
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    low = await scheduler.spawn(coro(), tags=("low",))
+    high = await scheduler.spawn(coro(), tags=("high",))
+    other = await scheduler.spawn(coro())
+    loop = asyncio.get_running_loop()
+    finished: Dict[Job[object], float] = {}
+
+    def on_done(job: Job[object]) -> None:
+        finished[job] = loop.time()
+
+    for job in (low, high, other):
+        job._add_done_callback(on_done)
+
+    start = loop.time()
+    await scheduler.drain(0.3, deadlines=[("high", 0.2), ("low", 0.05)])
+    assert loop.time() - start < 1
+    # Lower priority jobs are closed first.
+    assert finished[low] - start < 0.15
+    assert finished[low] < finished[high] < finished[other]
+    assert all(job.status == "cancelled" for job in (low, high, other))
+
+
+async def test_drain_empty(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler()
+    await scheduler.drain()
+    assert scheduler.closed
+    # Draining a closed scheduler is a no-op.
+    await scheduler.drain()
+
+
+async def test_child_borrows_parent_capacity(make_scheduler: _MakeScheduler) -> None:
+    parent = await make_scheduler(limit=2)
+    first = await make_scheduler(limit=2, parent=parent)
+    second = await make_scheduler(limit=None, parent=parent)
+    assert first.parent is parent
+    assert parent.children == (first, second)
+    fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+    async def coro() -> None:
+        await fut
+
+    await first.spawn(coro())
+    await second.spawn(coro())
+    # The parent has no free slot left.
+    await first.spawn(coro())
+    await parent.spawn(coro())
+    assert first.active_count == 1
+    assert first.pending_count == 1
+    assert parent.pending_count == 1
+    assert parent.total_active_count == 2
+    assert parent.total_pending_count == 2
+
+    fut.set_result(None)
+    for _ in range(10):
+        if not len(parent) + len(first) + len(second):
+            break
+        await asyncio.sleep(0)
+    assert parent.total_pending_count == 0
+    assert parent.total_active_count == 0
+
+
+async def test_child_counts(make_scheduler: _MakeScheduler) -> None:
+    parent = await make_scheduler(limit=1)
+    child = await make_scheduler(parent=parent)
+    grandchild = await make_scheduler(parent=child)
+    siblings = [await make_scheduler(parent=parent) for _ in range(3)]
+    fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+    async def coro() -> None:
+        await fut
+
+    running = await grandchild.spawn(coro())
+    pending = await siblings[1].spawn(coro())
+    assert parent.total_active_count == 1
+    assert child.total_active_count == 1
+    assert pending.pending
+    # Only children waiting for a slot are visited on release.
+    assert list(parent._waiting_children) == [siblings[1]]
+
+    await running.close()
+    assert pending.active
+    assert not parent._waiting_children
+    assert parent.total_active_count == 1
+    assert child.total_active_count == 0
+
+    await grandchild.spawn(coro())
+    assert list(parent._waiting_children) == [child]
+    assert list(child._waiting_children) == [grandchild]
+    await child.close()
+    assert not parent._waiting_children
+    assert parent.total_active_count == 1
+
+    await siblings[1].close()
+    assert parent.total_active_count == 0
+
+
+async def test_child_exception_handler(make_scheduler: _MakeScheduler) -> None:
+    parent_handler = mock.Mock()
+    child_handler = mock.Mock()
+    parent = await make_scheduler(exception_handler=parent_handler)
+    child = await make_scheduler(parent=parent, exception_handler=child_handler)
+
+    async def coro() -> NoReturn:
+        raise RuntimeError()
+
+    await child.spawn(coro())
+    for _ in range(10):
+        if child_handler.called:
+            break
+        await asyncio.sleep(0)
+    assert child_handler.called
+    assert not parent_handler.called
+
+
+async def test_close_parent_cascades(make_scheduler: _MakeScheduler) -> None:
+    parent = await make_scheduler(limit=1)
+    child = await make_scheduler(parent=parent)
+    grandchild = await make_scheduler(parent=child)
+
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    job = await grandchild.spawn(coro())
+    pending = await child.spawn(coro())
+    assert pending.pending
+
+    await parent.close()
+    assert child.closed
+    assert grandchild.closed
+    assert job.closed
+    assert pending.closed
+    assert parent.children == ()
+
+    with pytest.raises(RuntimeError, match="closed scheduler"):
+        await make_scheduler(parent=parent)
+
+
+async def test_close_child(make_scheduler: _MakeScheduler) -> None:
+    parent = await make_scheduler(limit=1)
+    child = await make_scheduler(parent=parent)
+
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    await child.spawn(coro())
+    job = await parent.spawn(coro())
+    assert job.pending
+
+    await child.close()
+    # The borrowed slot is released.
+    assert job.active
+    assert parent.children == ()
+    assert not parent.closed
+
+
+async def test_fair_queue(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(
+        limit=1, fair_queue=True, tenant_weights={"big": 2}
+    )
+    assert scheduler.fair_queue
+    order: List[str] = []
+    fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+    async def blocker() -> None:
+        await fut
+
+    async def coro(name: str) -> None:
+        order.append(name)
+
+    await scheduler.spawn(blocker())
+    for i in range(4):
+        await scheduler.spawn(coro(f"big{i}"), tenant="big")
+    small = await scheduler.spawn(coro("small0"), tenant="small")
+    await scheduler.spawn(coro("small1"), tenant="small")
+    await scheduler.spawn(coro("default"))
+    assert scheduler.pending_count == 7
+    await small.close()
+
+    fut.set_result(None)
+    await scheduler.wait_and_close()
+    # Tenants take turns, "big" takes two jobs per turn.
+    assert order == ["big0", "big1", "small1", "default", "big2", "big3"]
+
+
+async def test_fair_queue_drop_oldest(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(
+        limit=1, pending_limit=3, overflow_policy="drop_oldest", fair_queue=True
+    )
+
+    async def coro() -> None:
+        await asyncio.sleep(10)
+
+    await scheduler.spawn(coro())
+    big = [await scheduler.spawn(coro(), tenant="big") for _ in range(2)]
+    small = await scheduler.spawn(coro(), tenant="small")
+    await scheduler.spawn(coro(), tenant="small")
+    # The oldest job of the largest tenant is shed.
+    assert big[0].closed
+    assert not big[1].closed
+    assert not small.closed
+    assert scheduler.shed_count == 1
+
+
+async def test_fair_queue_invalid(make_scheduler: _MakeScheduler) -> None:
+    with pytest.raises(ValueError, match="requires fair_queue"):
+        await make_scheduler(tenant_weights={"a": 1})
+    with pytest.raises(ValueError, match="should be positive"):
+        await make_scheduler(fair_queue=True, tenant_weights={"a": 0})
+    scheduler = await make_scheduler()
+    assert not scheduler.fair_queue
+    with pytest.raises(ValueError, match="requires fair_queue"):
+        await scheduler.spawn(partial(asyncio.sleep, 0), tenant="a")
+
+
+async def test_as_completed(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1, exception_handler=mock.Mock())
+
+    async def coro(delay: float) -> float:
+        await asyncio.sleep(delay)
+        return delay
+
+    async def fail() -> NoReturn:
+        raise RuntimeError()
+
+    slow = await scheduler.spawn(coro(0.02))
+    pending = await scheduler.spawn(coro(0))
+    failed = await scheduler.spawn(fail())
+    closed = await scheduler.spawn(coro(10))
+    assert pending.pending
+    await closed.close()
+
+    assert set(scheduler) == {slow, pending, failed}
+    jobs = scheduler.as_completed([failed, pending, slow, closed])
+    # The closed job has finished already and goes first.
+    assert [job async for job in jobs] == [closed, slow, pending, failed]
+    assert await pending.wait() == 0
+
+
+async def test_as_completed_all(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(limit=1)
+
+    async def coro(delay: float) -> None:
+        await asyncio.sleep(delay)
+
+    jobs = [await scheduler.spawn(coro(delay)) for delay in (0.02, 0.01, 0)]
+    assert [job async for job in scheduler.as_completed()] == jobs
+
+
+async def test_as_completed_jobs(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler()
+
+    async def coro(delay: float) -> None:
+        await asyncio.sleep(delay)
+
+    fast = await scheduler.spawn(coro(0))
+    slow = await scheduler.spawn(coro(10))
+    jobs = scheduler.as_completed([slow, fast])
+    assert await jobs.__anext__() is fast
+    await jobs.aclose()
+    # The callback of the abandoned iteration is removed.
+    assert slow._callbacks == []
+
+
+async def test_map(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler()
+    pulled: List[int] = []
+    max_running = 0
+
+    async def source() -> AsyncIterator[int]:
+        for i in range(10):
+            pulled.append(i)
+            yield i
+
+    async def square(i: int) -> int:
+        nonlocal max_running
+        max_running = max(max_running, len(scheduler))
+        await asyncio.sleep(0.01 if i % 2 else 0)
+        return i * i
+
+    results = [r async for r in scheduler.map(square, source(), window=3)]
+    assert sorted(results) == [i * i for i in range(10)]
+    assert max_running <= 3
+
+    ordered = scheduler.map(square, source(), ordered=True, window=3)
+    assert [r async for r in ordered] == [i * i for i in range(10)]
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+@pytest.mark.parametrize("result_policy", ["drop", "weak"])
+async def test_map_result_policy(
+    make_scheduler: _MakeScheduler, result_policy: str, ordered: bool
+) -> None:
+    scheduler = await make_scheduler(result_policy=result_policy)
+
+    async def source() -> AsyncIterator[int]:
+        for i in range(5):
+            yield i
+
+    async def coro(i: int) -> int:
+        await asyncio.sleep(0)
+        return i
+
+    results = [r async for r in scheduler.map(coro, source(), ordered=ordered)]
+    assert sorted(results) == list(range(5))
+
+
+async def test_map_lazy(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler()
+    pulled: List[int] = []
+
+    async def source() -> AsyncIterator[int]:
+        for i in range(1000):
+            pulled.append(i)
+            yield i
+
+    async def coro(i: int) -> int:
+        await asyncio.sleep(0)
+        return i
+
+    results = scheduler.map(coro, source(), ordered=True, window=2)
+    assert await results.__anext__() == 0
+    await results.aclose()
+    # Only the window has been pulled, the rest of jobs are closed.
+    assert len(pulled) <= 3
+    assert len(scheduler) == 0
+
+
+async def test_map_failure(make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler()
+
+    async def source() -> AsyncIterator[int]:
+        for i in range(5):
+            yield i
+
+    async def coro(i: int) -> int:
+        if i == 0:
+            raise RuntimeError("fail")
+        await asyncio.sleep(10)
+        return i
+
+    with pytest.raises(RuntimeError, match="fail"):
+        async for _ in scheduler.map(coro, source()):
+            pass
+    assert len(scheduler) == 0
+
+    with pytest.raises(ValueError):
+        await scheduler.map(coro, source(), window=0).__anext__()
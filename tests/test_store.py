@@ -0,0 +1,311 @@
+import asyncio
+import pickle
+from collections.abc import Awaitable
+from pathlib import Path
+from typing import Callable, Iterator, List
+from unittest import mock
+
+import pytest
+
+from aiojobs import JobStore, Scheduler
+from aiojobs._store import dump_spec, load_spec
+
+_MakeScheduler = Callable[..., Awaitable[Scheduler]]
+
+results: List[int] = []
+
+
+async def record(value: int, *, delay: float = 0) -> None:
+    await asyncio.sleep(delay)
+    results.append(value)
+
+
+# Request it ahead of make_scheduler, the scheduler flushes the store on close.
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[JobStore]:
+    results.clear()
+    store = JobStore(tmp_path / "jobs.sqlite")
+    yield store
+    store.close()
+
+
+def test_store_push_pop(store: JobStore) -> None:
+    assert len(store) == 0
+    assert store.path.endswith("jobs.sqlite")
+    store.push([b"1", b"2", b"3"])
+    assert len(store) == 3
+    assert repr(store).endswith("jobs=3>")
+    assert store.pop(2) == [b"1", b"2"]
+    assert store.pop(2) == [b"3"]
+    assert store.pop(2) == []
+    assert len(store) == 0
+
+
+def test_store_reopen(tmp_path: Path) -> None:
+    store = JobStore(tmp_path / "jobs.sqlite")
+    store.push([b"1", b"2"])
+    store.close()
+
+    store = JobStore(tmp_path / "jobs.sqlite")
+    assert len(store) == 2
+    assert store.pop(10) == [b"1", b"2"]
+    store.close()
+
+
+def test_spec_roundtrip() -> None:
+    spec = load_spec(dump_spec((record, (1,), {"delay": 0})))
+    assert spec == (record, (1,), {"delay": 0})
+
+
+async def test_defer_requires_store(scheduler: Scheduler) -> None:
+    assert scheduler.job_store is None
+    assert scheduler.spilled_count == 0
+    with pytest.raises(RuntimeError, match="requires a job_store"):
+        scheduler.defer(record, 1)
+
+
+async def test_defer_in_memory(store: JobStore, make_scheduler: _MakeScheduler) -> None:
+    scheduler = await make_scheduler(job_store=store, limit=1, spill_threshold=2)
+    assert scheduler.job_store is store
+    assert scheduler.spill_threshold == 2
+
+    scheduler.defer(record, 1)
+    scheduler.defer(record, 2)
+    assert scheduler.active_count == 1
+    assert scheduler.pending_count == 1
+    assert scheduler.spilled_count == 0
+
+    await scheduler.wait_and_close()
+    assert results == [1, 2]
+
+
+async def test_defer_spill_and_refill(
+    store: JobStore, make_scheduler: _MakeScheduler
+) -> None:
+    scheduler = await make_scheduler(job_store=store, limit=2, spill_threshold=4)
+
+    for i in range(20):
+        scheduler.defer(record, i)
+    assert scheduler.active_count == 2
+    assert scheduler.pending_count == 4
+    assert scheduler.spilled_count == 14
+
+    for _ in range(100):
+        if len(scheduler) == 0:
+            break
+        await asyncio.sleep(0)
+    # FIFO order is kept through the spill.
+    assert results == list(range(20))
+    assert scheduler.spilled_count == 0
+    assert len(scheduler) == 0
+
+
+async def test_defer_spill_batched_commits(
+    store: JobStore, make_scheduler: _MakeScheduler
+) -> None:
+    scheduler = await make_scheduler(
+        job_store=store, limit=1, pending_limit=1, spill_threshold=4
+    )
+
+    for i in range(10):
+        scheduler.defer(record, i)
+    assert scheduler.spilled_count == 8
+    # The full pending queue takes nothing back, spills aren't committed
+    # one by one.
+    assert store._uncommitted == 8
+    await scheduler.wait_and_close()
+    assert results == list(range(10))
+
+
+async def test_defer_backlog_without_running_jobs(
+    store: JobStore, make_scheduler: _MakeScheduler
+) -> None:
+    store.push([dump_spec((record, (1,), {}))])
+    scheduler = await make_scheduler(job_store=store, spill_threshold=4)
+
+    scheduler.defer(record, 2)
+    assert scheduler.spilled_count == 0
+    await scheduler.wait_and_close()
+    assert results == [1, 2]
+
+
+async def test_defer_spill_unpicklable(
+    store: JobStore, make_scheduler: _MakeScheduler
+) -> None:
+    scheduler = await make_scheduler(job_store=store, limit=1, spill_threshold=1)
+
+    async def local() -> None:
+        pass
+
+    scheduler.defer(record, 1, delay=1)
+    scheduler.defer(record, 2)
+    with pytest.raises((pickle.PicklingError, AttributeError)):
+        scheduler.defer(local)
+
+
+async def test_defer_restore_failed(
+    store: JobStore, make_scheduler: _MakeScheduler
+) -> None:
+    exc_handler = mock.Mock()
+    store.push([b"garbage", dump_spec((record, (1,), {}))])
+    scheduler = await make_scheduler(
+        job_store=store, spill_threshold=4, exception_handler=exc_handler
+    )
+    scheduler.defer(record, 2)
+    await scheduler.wait_and_close()
+
+    assert results == [1, 2]
+    exc_handler.assert_called_once_with(
+        scheduler, {"message": "Restoring a deferred job failed", "exception": mock.ANY}
+    )
+
+
+async def test_spill_threshold_invalid(make_scheduler: _MakeScheduler) -> None:
+    with pytest.raises(ValueError):
+        await make_scheduler(spill_threshold=0)
+
+
+def test_store_push_front(store: JobStore) -> None:
+    store.push_front([b"1"])
+    store.push([b"2", b"3"])
+    store.push_front([b"-1", b"0"])
+    assert len(store) == 5
+    assert store.pop(10) == [b"-1", b"0", b"1", b"2", b"3"]
+
+
+async def test_persist_on_close_invalid(
+    store: JobStore, make_scheduler: _MakeScheduler
+) -> None:
+    with pytest.raises(ValueError, match="requires job_store"):
+        await make_scheduler(persist_on_close="pending")
+    with pytest.raises(ValueError, match="Unknown persist policy"):
+        await make_scheduler(job_store=store, persist_on_close="unknown")
+
+
+async def test_persist_pending_on_close(
+    store: JobStore, make_scheduler: _MakeScheduler
+) -> None:
+    scheduler = await make_scheduler(
+        job_store=store, limit=1, spill_threshold=2, persist_on_close="pending"
+    )
+    assert scheduler.persist_on_close == "pending"
+    for i in range(5):
+        scheduler.defer(record, i, delay=10)
+    # Jobs spawned directly have no spec and are never persisted.
+    await scheduler.spawn(record(10))
+    assert scheduler.spilled_count == 2
+
+    await scheduler.close()
+    assert results == []
+    # The running job is lost, the pending ones go ahead of the spilled ones.
+    assert [load_spec(data)[1] for data in store.pop(10)] == [(1,), (2,), (3,), (4,)]
+
+
+async def test_persist_on_close_committed(
+    store: JobStore, make_scheduler: _MakeScheduler
+) -> None:
+    scheduler = await make_scheduler(
+        job_store=store, limit=1, persist_on_close="pending"
+    )
+    for i in range(5):
+        scheduler.defer(record, i, delay=10)
+    await scheduler.close()
+
+    # Persisted jobs are visible without closing the store.
+    reopened = JobStore(store.path)
+    try:
+        assert len(reopened) == 4
+    finally:
+        reopened.close()
+
+
+async def test_persist_all_on_close(
+    store: JobStore, make_scheduler: _MakeScheduler
+) -> None:
+    scheduler = await make_scheduler(job_store=store, limit=2, persist_on_close="all")
+    scheduler.defer(record, 1)
+    scheduler.defer(record, 2, delay=10)
+    scheduler.defer(record, 3, delay=10)
+    scheduler.defer(record, 4)
+    await asyncio.sleep(0.01)
+    assert results == [1]
+
+    await scheduler.close()
+    args = [load_spec(data)[1] for data in store.pop(10)]
+    # Cancelled running jobs go first, in no particular order.
+    assert set(args[:2]) == {(2,), (3,)}
+    assert args[2:] == [(4,)]
+
+
+async def test_persist_unpicklable(
+    store: JobStore, make_scheduler: _MakeScheduler
+) -> None:
+    exc_handler = mock.Mock()
+    scheduler = await make_scheduler(
+        job_store=store,
+        limit=1,
+        persist_on_close="pending",
+        exception_handler=exc_handler,
+    )
+
+    async def local() -> None:
+        pass
+
+    scheduler.defer(record, 1, delay=10)
+    scheduler.defer(local)
+    scheduler.defer(record, 2)
+    await scheduler.close()
+
+    assert [load_spec(data)[1] for data in store.pop(10)] == [(2,)]
+    exc_handler.assert_called_once_with(
+        scheduler,
+        {"message": "Persisting a deferred job failed", "exception": mock.ANY},
+    )
+
+
+async def test_restore(tmp_path: Path, make_scheduler: _MakeScheduler) -> None:
+    results.clear()
+    store = JobStore(tmp_path / "jobs.sqlite")
+    scheduler = await make_scheduler(
+        job_store=store, limit=1, persist_on_close="pending"
+    )
+    for i in range(3):
+        scheduler.defer(record, i, delay=0.01)
+    await scheduler.close()
+    store.close()
+
+    store = JobStore(tmp_path / "jobs.sqlite")
+    scheduler = await make_scheduler(job_store=store, limit=1, spill_threshold=1)
+    assert scheduler.restore() == 2
+    assert scheduler.active_count == 1
+    assert scheduler.pending_count == 1
+    await scheduler.wait_and_close()
+    store.close()
+    assert results == [1, 2]
+
+
+async def test_restore_requires_store(scheduler: Scheduler) -> None:
+    with pytest.raises(RuntimeError, match="requires a job_store"):
+        scheduler.restore()
+
+
+async def test_defer_job_not_reused(
+    store: JobStore, make_scheduler: _MakeScheduler
+) -> None:
+    scheduler = await make_scheduler(job_store=store)
+
+    scheduler.defer(record, 1)
+    (job,) = scheduler
+    for _ in range(10):
+        if not len(scheduler):
+            break
+        await asyncio.sleep(0)
+    assert job.status == "done"
+
+    scheduler.defer(record, 2)
+    (other,) = scheduler
+    assert other is not job
+    assert job.status == "done"
+    assert await job.wait() is None
+    await scheduler.wait_and_close()
+    assert results == [1, 2]